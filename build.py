@@ -1,55 +1,106 @@
 #!/usr/bin/env python3
-"""Build script for creating distributable executables using Flet's packaging."""
+"""Build script for creating distributable executables."""
 
+import argparse
+import asyncio
+import hashlib
+import json
+import os
 import platform
 import shutil
 import subprocess
 import sys
+from collections.abc import Callable
+from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 
+APP_NAME = "LANTransfer"
+CACHE_FILE = ".build_cache.json"
+# Bytecode optimization level for bundled modules (2 = strip asserts and docstrings)
+BYTECODE_OPTIMIZE = 2
+
+_PLATFORM_MAP = {"darwin": "macos", "linux": "linux", "windows": "windows"}
+_PLATFORM_NAME = _PLATFORM_MAP.get(platform.system().lower(), platform.system().lower())
+
 
 def get_platform_name() -> str:
     """Get the current platform name."""
-    system = platform.system().lower()
-    if system == "darwin":
-        return "macos"
-    elif system == "linux":
-        return "linux"
-    elif system == "windows":
-        return "windows"
-    return system
-
-
-def build():
-    """Build the application using flet pack."""
-    print("=" * 60)
-    print("Building LAN Transfer")
-    print("=" * 60)
+    return _PLATFORM_NAME
 
-    # Ensure we're in the project root
-    project_root = Path(__file__).parent
-    src_dir = project_root / "src"
-    dist_dir = project_root / "dist"
-    build_dir = project_root / "build"
 
-    # Clean previous builds
-    print("\n[1/3] Cleaning previous builds...")
-    if dist_dir.exists():
-        shutil.rmtree(dist_dir)
-    if build_dir.exists():
-        shutil.rmtree(build_dir)
-    
+def _move_aside(project_root: Path, *paths: Path) -> list[Path]:
+    """Rename previous build outputs out of the way so they can be deleted later."""
+    # Pick up leftovers from an interrupted run as well
+    stale = list(project_root.glob(".*.old-*"))
+    for path in paths:
+        if path.exists():
+            trash = path.with_name(f".{path.name}.old-{os.getpid()}")
+            try:
+                os.replace(path, trash)
+            except OSError:
+                # e.g. dist/ is itself a mount point; clear it in place instead
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            stale.append(trash)
+    return stale
+
+
+async def _remove_all(paths: list[Path]) -> None:
+    """Delete stale build trees, each on its own worker thread."""
+    # On Linux rmtree already unlinks relative to open directory fds (unlinkat), and
+    # this runs off the critical path alongside the packager, so it is not worth a
+    # native batch-unlink dependency
+    await asyncio.gather(
+        *(asyncio.to_thread(shutil.rmtree, path, ignore_errors=True) for path in paths)
+    )
+
+
+def _clean(project_root: Path, dist_dir: Path, build_dir: Path, clean: bool) -> list[Path]:
+    """
+    Clear previous build outputs.
+
+    Returns:
+        Stale trees that still need deleting
+    """
+    # build/ holds PyInstaller's analysis cache, so keep it unless asked not to
+    if clean:
+        stale = _move_aside(project_root, dist_dir, build_dir)
+    else:
+        stale = _move_aside(project_root, dist_dir)
+
     # Also clean any .spec files
     for spec_file in project_root.glob("*.spec"):
         spec_file.unlink()
 
-    # Build using flet pack
-    print("\n[2/3] Building with flet pack...")
-    
-    platform_name = get_platform_name()
-    print(f"  Target platform: {platform_name}")
+    return stale
+
+
+def _load_cache(project_root: Path) -> dict:
+    """Load values remembered from previous builds."""
+    try:
+        with open(project_root / CACHE_FILE) as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+
+def _save_cache(project_root: Path, cache: dict) -> None:
+    """Persist values for the next build."""
+    try:
+        with open(project_root / CACHE_FILE, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass
+
+
+def _find_flet_cmd(project_root: Path) -> str:
+    """Locate the flet CLI, falling back to the project venv."""
+    # Reuse the last resolved path rather than walking PATH again
+    cache = _load_cache(project_root)
+    flet_cmd = cache.get("flet_cmd")
+    if flet_cmd and os.path.exists(flet_cmd):
+        return flet_cmd
 
-    # Flet pack arguments - use flet CLI directly
     flet_cmd = shutil.which("flet")
     if not flet_cmd:
         # Try to find flet in the venv
@@ -57,13 +108,248 @@ def build():
             flet_cmd = str(project_root / ".venv" / "Scripts" / "flet.exe")
         else:
             flet_cmd = str(project_root / ".venv" / "bin" / "flet")
-    
+
+    if os.path.exists(flet_cmd):
+        cache["flet_cmd"] = flet_cmd
+        _save_cache(project_root, cache)
+    return flet_cmd
+
+
+def _flet_args(project_root: Path, src_dir: Path) -> list[str]:
+    """Command line for packaging with flet pack."""
+    return [
+        _find_flet_cmd(project_root), "pack",
+        str(src_dir / "lantransfer" / "__main__.py"),
+        "--name", APP_NAME,
+        # One-folder bundle: avoids unpacking the whole app to a temp dir on every launch
+        "--onedir",
+        # Compile the package into the archive instead of shipping its sources as data;
+        # run_app is imported lazily inside main(), so name it explicitly
+        "--hidden-import", "lantransfer.app",
+    ]
+
+
+_SPEC_TEMPLATE = """\
+# Generated by build.py; edit the template there instead.
+
+a = Analysis(
+    [{entry!r}],
+    pathex=[{src_dir!r}],
+    # run_app is imported lazily inside main(), so name it explicitly
+    hiddenimports=["lantransfer.app"],
+    excludes=["tkinter", "test"],
+)
+pyz = PYZ(a.pure)
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name={name!r},
+    console=False,
+    strip={strip!r},
+    upx=False,
+)
+coll = COLLECT(exe, a.binaries, a.datas, strip={strip!r}, upx=False, name={name!r})
+"""
+
+_BUNDLE_TEMPLATE = """\
+app = BUNDLE(coll, name={bundle!r})
+"""
+
+
+def _ensure_spec(project_root: Path, src_dir: Path) -> Path:
+    """Write the PyInstaller spec file, touching it only when its content changes."""
+    spec_path = project_root / "build" / f"{APP_NAME}.spec"
+    content = _SPEC_TEMPLATE.format(
+        entry=str(src_dir / "lantransfer" / "__main__.py"),
+        src_dir=str(src_dir),
+        name=APP_NAME,
+        # Drop debug symbols from collected binaries (Windows has no bundled strip).
+        # UPX stays off: packed libraries must be decompressed on every launch, and
+        # some Flet/MSVC runtime DLLs break under it
+        strip=platform.system() in ("Linux", "Darwin"),
+    )
+    if platform.system() == "Darwin":
+        content += _BUNDLE_TEMPLATE.format(bundle=f"{APP_NAME}.app")
+
+    if not spec_path.exists() or spec_path.read_text() != content:
+        spec_path.parent.mkdir(parents=True, exist_ok=True)
+        spec_path.write_text(content)
+    return spec_path
+
+
+def _pyinstaller_args(project_root: Path, src_dir: Path) -> list[str]:
+    """Command line for packaging with PyInstaller directly."""
+    return [
+        sys.executable, "-m", "PyInstaller",
+        str(_ensure_spec(project_root, src_dir)),
+        "--noconfirm",
+    ]
+
+
+def _nuitka_args(project_root: Path, src_dir: Path) -> list[str]:
+    """Command line for compiling to a native standalone app with Nuitka."""
     args = [
-        flet_cmd, "pack",
+        sys.executable, "-m", "nuitka",
         str(src_dir / "lantransfer" / "__main__.py"),
-        "--name", "LANTransfer",
-        "--add-data", f"{src_dir / 'lantransfer'}:lantransfer",
+        # Folder output rather than --onefile, for the same startup reasons as --onedir
+        "--standalone",
+        "--lto=yes",
+        "--follow-imports",
+        # run_app is imported lazily inside main(), so name the package explicitly
+        "--include-package=lantransfer",
+        f"--output-dir={project_root / 'build' / 'nuitka'}",
+        f"--output-filename={APP_NAME}",
+        f"--output-folder-name={APP_NAME}",
+        "--assume-yes-for-downloads",
+        "--python-flag=no_asserts,no_docstrings",
     ]
+    if platform.system() == "Darwin":
+        args.append("--macos-create-app-bundle")
+    elif platform.system() == "Windows":
+        args.append("--windows-console-mode=disable")
+    return args
+
+
+def _collect_nuitka_output(build_dir: Path, dist_dir: Path) -> None:
+    """Move Nuitka's output from its build folder to the usual dist/ layout."""
+    if platform.system() == "Darwin":
+        produced = build_dir / "nuitka" / f"{APP_NAME}.app"
+        target = dist_dir / f"{APP_NAME}.app"
+    else:
+        # --output-folder-name replaces the default <script>.dist folder name
+        produced = build_dir / "nuitka" / APP_NAME
+        target = dist_dir / APP_NAME
+
+    if produced.exists():
+        dist_dir.mkdir(parents=True, exist_ok=True)
+        os.replace(produced, target)
+
+
+BACKENDS: dict[str, Callable[[Path, Path], list[str]]] = {
+    "flet": _flet_args,
+    "pyinstaller": _pyinstaller_args,
+    "nuitka": _nuitka_args,
+}
+
+# (distribution, requirement) of the packager each backend drives; flet pack runs PyInstaller
+BACKEND_TOOLS = {
+    "flet": ("pyinstaller", "pyinstaller>=6.0.0"),
+    "pyinstaller": ("pyinstaller", "pyinstaller>=6.0.0"),
+    "nuitka": ("nuitka", "nuitka>=2.3"),
+}
+
+
+def _ensure_tool(dist_name: str, requirement: str) -> None:
+    """Install a packager if missing, reading only its metadata rather than importing it."""
+    try:
+        ver = version(dist_name)
+    except PackageNotFoundError:
+        print(f"  Installing {requirement}...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", requirement])
+        ver = version(dist_name)
+    print(f"  {dist_name} version: {ver}")
+
+
+def _scan_sources(path: str | Path, root: Path, out: list[tuple[str, int, int]]) -> None:
+    """Collect (relative path, mtime_ns, size) for every source file under a directory."""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name != "__pycache__":
+                    _scan_sources(entry.path, root, out)
+            elif entry.is_file(follow_symlinks=False):
+                st = entry.stat(follow_symlinks=False)
+                out.append((os.path.relpath(entry.path, root), st.st_mtime_ns, st.st_size))
+
+
+def _source_fingerprint(project_root: Path, src_dir: Path, backend: str) -> str:
+    """Hash the metadata of every build input, without reading file contents."""
+    entries: list[tuple[str, int, int]] = []
+    _scan_sources(src_dir, project_root, entries)
+    for path in (project_root / "pyproject.toml", Path(__file__)):
+        st = path.stat()
+        entries.append((path.name, st.st_mtime_ns, st.st_size))
+
+    h = hashlib.blake2b(backend.encode())
+    for entry in sorted(entries):
+        h.update(repr(entry).encode())
+    return h.hexdigest()
+
+
+def _output_path(dist_dir: Path) -> Path:
+    """Path of the executable or app bundle a successful build produces."""
+    if platform.system() == "Darwin":
+        return dist_dir / f"{APP_NAME}.app"
+    if platform.system() == "Windows":
+        return dist_dir / APP_NAME / f"{APP_NAME}.exe"
+    return dist_dir / APP_NAME / APP_NAME
+
+
+def _dir_size(path: str | Path) -> int:
+    """Total size of the files under a directory, without following symlinks."""
+    total = 0
+    # DirEntry reuses the type info from the directory read, so only files cost a stat()
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+            elif entry.is_dir(follow_symlinks=False):
+                total += _dir_size(entry.path)
+    return total
+
+
+def _report_size(path: Path) -> None:
+    """Print the on-disk size of a build output."""
+    if path.is_dir():
+        total_size = _dir_size(path)
+    else:
+        total_size = path.stat().st_size
+    print(f"   Size: {total_size / (1024*1024):.1f} MB")
+
+
+async def build(backend: str = "flet", clean: bool = False):
+    """
+    Build the application.
+
+    Args:
+        backend: Packager to use, one of BACKENDS
+        clean: Also discard build/, forcing PyInstaller to redo its analysis
+    """
+    print("=" * 60)
+    print("Building LAN Transfer")
+    print("=" * 60)
+
+    # Ensure we're in the project root
+    project_root = Path(__file__).parent
+    src_dir = project_root / "src"
+    dist_dir = project_root / "dist"
+    build_dir = project_root / "build"
+
+    # Skip the packager entirely when nothing it consumes has changed
+    sentinel = dist_dir / ".build_hash"
+    fingerprint = _source_fingerprint(project_root, src_dir, backend)
+    if (
+        not clean
+        and _output_path(dist_dir).exists()
+        and sentinel.exists()
+        and sentinel.read_text() == fingerprint
+    ):
+        print(f"\n✅ Up to date: {_output_path(dist_dir)}")
+        return
+
+    # Clean previous builds
+    print("\n[1/3] Cleaning previous builds...")
+    stale = _clean(project_root, dist_dir, build_dir, clean)
+
+    print(f"\n[2/3] Building with {backend}...")
+
+    platform_name = get_platform_name()
+    print(f"  Target platform: {platform_name}")
+
+    _ensure_tool(*BACKEND_TOOLS[backend])
+    args = BACKENDS[backend](project_root, src_dir)
 
     # Platform-specific options
     if platform.system() == "Darwin":
@@ -76,38 +362,59 @@ def build():
         # Windows: Creates .exe
         print("  Building Windows executable...")
 
-    # Run flet pack
-    result = subprocess.run(args, cwd=project_root, input=b"y\n")
+    # Give each target its own PyInstaller cache so concurrent builds (e.g. a CI
+    # matrix sharing a runner) never corrupt each other's intermediates
+    target = f"{platform_name}-{platform.machine().lower()}"
+    env = dict(os.environ)
+    env["PYINSTALLER_CONFIG_DIR"] = str(build_dir / f"pyi-{target}")
+    # Let the analysis resolve the lantransfer package from the source tree
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(src_dir), env.get("PYTHONPATH")]))
+    # PyInstaller compiles bundled modules at the build interpreter's optimization level
+    env["PYTHONOPTIMIZE"] = str(BYTECODE_OPTIMIZE)
 
-    if result.returncode != 0:
+    # Run the packager, deleting the previous outputs while it works
+    proc = await asyncio.create_subprocess_exec(
+        *args, cwd=project_root, env=env, stdin=asyncio.subprocess.PIPE
+    )
+    await asyncio.gather(
+        proc.communicate(b"y\n"),
+        _remove_all(stale),
+    )
+
+    if proc.returncode != 0:
         print("\n❌ Build failed!")
         sys.exit(1)
 
+    if backend == "nuitka":
+        _collect_nuitka_output(build_dir, dist_dir)
+
     # Report results
     print("\n[3/3] Finalizing...")
-    
+
+    if _output_path(dist_dir).exists():
+        sentinel.write_text(fingerprint)
+
     if platform.system() == "Darwin":
-        app_path = dist_dir / "LANTransfer.app"
+        app_path = dist_dir / f"{APP_NAME}.app"
         if app_path.exists():
-            # Calculate app size
-            total_size = sum(f.stat().st_size for f in app_path.rglob("*") if f.is_file())
             print(f"\n✅ Build successful!")
             print(f"   Output: {app_path}")
-            print(f"   Size: {total_size / (1024*1024):.1f} MB")
+            _report_size(app_path)
             print(f"\n   To run: open {app_path}")
-            print(f"   Or double-click LANTransfer.app in Finder")
+            print(f"   Or double-click {APP_NAME}.app in Finder")
         else:
             print(f"\n⚠️  App bundle not found at expected location")
             print(f"   Check {dist_dir} for output files")
     else:
-        exe_path = dist_dir / "LANTransfer"
+        app_dir = dist_dir / APP_NAME
+        exe_path = app_dir / APP_NAME
         if platform.system() == "Windows":
-            exe_path = dist_dir / "LANTransfer.exe"
-        
+            exe_path = app_dir / f"{APP_NAME}.exe"
+
         if exe_path.exists():
             print(f"\n✅ Build successful!")
-            print(f"   Output: {exe_path}")
-            print(f"   Size: {exe_path.stat().st_size / (1024*1024):.1f} MB")
+            print(f"   Output: {app_dir}")
+            _report_size(app_dir)
             print(f"\n   To run: {exe_path}")
         else:
             print(f"\n⚠️  Executable not found at expected location")
@@ -116,7 +423,21 @@ def build():
 
 def main():
     """Main entry point."""
-    build()
+    parser = argparse.ArgumentParser(description="Build LAN Transfer executables")
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        default="flet",
+        help="packager to build with (default: flet)",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="discard the PyInstaller cache in build/ and rebuild from scratch",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(build(backend=args.backend, clean=args.clean))
 
 
 if __name__ == "__main__":
@@ -1,19 +1,36 @@
 """Entry point for LAN Transfer application."""
 
+import asyncio
+import multiprocessing
 import sys
+import threading
+
+
+def _preload_network_stack() -> None:
+    """Import the networking libraries while the main thread loads Flet."""
+    try:
+        import aiohttp  # noqa: F401
+        import zeroconf  # noqa: F401
+    except Exception:
+        # Best effort only; the real import in lantransfer.app reports any failure
+        pass
 
 
 def main() -> int:
     """Main entry point for the application."""
+    if sys.platform == "win32":
+        # Pin the IOCP-based loop before Flet is imported and captures the policy
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+    # Overlap the aiohttp/zeroconf imports with Flet's, which lantransfer.app pulls in first
+    threading.Thread(target=_preload_network_stack, daemon=True).start()
+
     from lantransfer.app import run_app
 
     return run_app()
 
 
 if __name__ == "__main__":
+    # Must run first so frozen helper processes exit before importing the GUI stack
+    multiprocessing.freeze_support()
     sys.exit(main())
-
-
-
-
-
@@ -1,6 +1,10 @@
 """Main Flet application for LAN Transfer."""
 
 import asyncio
+import logging
+import logging.handlers
+import subprocess
+import sys
 from pathlib import Path
 
 import flet as ft
@@ -8,8 +12,15 @@ import flet as ft
 from lantransfer import __app_name__, __version__
 from lantransfer.discovery import DiscoveryService, Peer
 from lantransfer.transfer import QueuedTransfer, TransferDirection, TransferManager
-from lantransfer.utils import DEFAULT_PORT, format_size, get_downloads_dir, get_local_ip
+from lantransfer.utils import (
+    DEFAULT_PORT,
+    format_size,
+    get_data_dir,
+    get_downloads_dir,
+    get_local_ip,
+)
 
+logger = logging.getLogger(__name__)
 
 # Color scheme - Modern dark theme with cyan accents
 COLORS = {
@@ -26,38 +37,77 @@ COLORS = {
     "warning": "#f59e0b",
 }
 
+# Hot-path colors as plain constants, skipping the COLORS lookup per card
+PRIMARY = COLORS["primary"]
+SECONDARY = COLORS["secondary"]
+SURFACE = COLORS["surface"]
+SURFACE_VARIANT = COLORS["surface_variant"]
+TEXT = COLORS["text"]
+TEXT_SECONDARY = COLORS["text_secondary"]
+SUCCESS = COLORS["success"]
+ERROR = COLORS["error"]
+WARNING = COLORS["warning"]
+
+# Shared, never-mutated style objects reused by every card instead of rebuilt per instance
+_PAD_CARD = ft.padding.all(12)
+_PAD_HEADER = ft.padding.symmetric(horizontal=20, vertical=12)
+_BORDER_UNSELECTED = ft.border.all(1, SURFACE_VARIANT)
+_BORDER_SELECTED = ft.border.all(2, PRIMARY)
+_BORDER_DROPZONE_IDLE = ft.border.all(2, SURFACE_VARIANT)
+_BORDER_DROPZONE_ACTIVE = ft.border.all(2, PRIMARY)
+
+# Transfer status -> (color, icon); anything else shows as pending
+_STATUS_STYLE = {
+    "tarring": (SECONDARY, ft.Icons.FOLDER_ZIP),
+    "extracting": (SECONDARY, ft.Icons.FOLDER_OPEN),
+    "transferring": (PRIMARY, ft.Icons.SYNC),
+    "completed": (SUCCESS, ft.Icons.CHECK_CIRCLE),
+    "failed": (ERROR, ft.Icons.ERROR),
+    "retrying": (WARNING, ft.Icons.REFRESH),
+    "cancelled": (WARNING, ft.Icons.CANCEL),
+}
+_DEFAULT_STATUS_STYLE = (TEXT_SECONDARY, ft.Icons.HOURGLASS_EMPTY)
+_STATUS_LABELS = {"tarring": "Packing...", "extracting": "Extracting..."}
+
+# Device icon by hostname hint, first match wins
+_NAME_ICONS = (
+    ("mac", ft.Icons.LAPTOP_MAC),
+    ("book", ft.Icons.LAPTOP_MAC),
+    ("linux", ft.Icons.COMPUTER),
+    ("ubuntu", ft.Icons.COMPUTER),
+)
+
+UI_UPDATE_INTERVAL = 0.05  # Coalesce page updates to at most ~20 per second
+
 
 class DeviceCard(ft.Container):
     """Card representing a discovered peer device."""
 
-    def __init__(self, peer: Peer, on_select: callable):
+    def __init__(self, peer: Peer, on_select: callable, on_change: callable = None):
         self.peer = peer
         self._on_select = on_select
-        self._selected = False
+        self._on_change = on_change
 
         # Device icon based on name hints
-        icon = ft.Icons.COMPUTER
-        if "mac" in peer.name.lower() or "book" in peer.name.lower():
-            icon = ft.Icons.LAPTOP_MAC
-        elif "linux" in peer.name.lower() or "ubuntu" in peer.name.lower():
-            icon = ft.Icons.COMPUTER
+        name_lc = peer.name.lower()
+        icon = next((ic for sub, ic in _NAME_ICONS if sub in name_lc), ft.Icons.COMPUTER)
 
         super().__init__(
             content=ft.Row(
                 [
-                    ft.Icon(icon, color=COLORS["primary"], size=28),
+                    ft.Icon(icon, color=PRIMARY, size=28),
                     ft.Column(
                         [
                             ft.Text(
                                 peer.name,
                                 size=14,
                                 weight=ft.FontWeight.W_600,
-                                color=COLORS["text"],
+                                color=TEXT,
                             ),
                             ft.Text(
                                 peer.address,
                                 size=12,
-                                color=COLORS["text_secondary"],
+                                color=TEXT_SECONDARY,
                             ),
                         ],
                         spacing=2,
@@ -66,23 +116,26 @@ class DeviceCard(ft.Container):
                 ],
                 spacing=12,
             ),
-            padding=ft.padding.all(12),
+            padding=_PAD_CARD,
             border_radius=8,
-            bgcolor=COLORS["surface_variant"],
-            border=ft.border.all(1, COLORS["surface_variant"]),
+            bgcolor=SURFACE_VARIANT,
+            border=_BORDER_UNSELECTED,
             on_click=self._handle_click,
             ink=True,
         )
 
     def _handle_click(self, e):
-        self._selected = not self._selected
-        self.border = ft.border.all(
-            2 if self._selected else 1,
-            COLORS["primary"] if self._selected else COLORS["surface_variant"],
-        )
-        self.update()
+        # The shared border object doubles as the selection flag
+        selected = self.border is not _BORDER_SELECTED
+        self.border = _BORDER_SELECTED if selected else _BORDER_UNSELECTED
         if self._on_select:
-            self._on_select(self.peer if self._selected else None)
+            self._on_select(self.peer if selected else None)
+
+        # Let the owner batch the border change with the selection redraw
+        if self._on_change:
+            self._on_change()
+        else:
+            self.update()
 
 
 class TransferCard(ft.Container):
@@ -92,6 +145,13 @@ class TransferCard(ft.Container):
         self.transfer = transfer
         self._on_cancel = on_cancel
 
+        # Status the styling was last applied for, see update_from
+        self._last_status: str | None = None
+
+        # Last (speed KB/s, ETA seconds) bucket and the string formatted for it
+        self._speed_eta_key: tuple[int, int] | None = None
+        self._speed_eta_str = ""
+
         # Direction icon
         if transfer.direction == TransferDirection.OUTGOING:
             direction_icon = ft.Icons.UPLOAD_FILE
@@ -100,85 +160,50 @@ class TransferCard(ft.Container):
             direction_icon = ft.Icons.FILE_DOWNLOAD
             direction_text = "← Receiving"
 
-        # Status color and icon
-        status_color = COLORS["text_secondary"]
-        status_icon = ft.Icons.HOURGLASS_EMPTY
-        status_text = transfer.status.title()
-        
-        if transfer.status == "tarring":
-            status_color = COLORS["secondary"]
-            status_icon = ft.Icons.FOLDER_ZIP
-            status_text = "Packing..."
-        elif transfer.status == "extracting":
-            status_color = COLORS["secondary"]
-            status_icon = ft.Icons.FOLDER_OPEN
-            status_text = "Extracting..."
-        elif transfer.status == "transferring":
-            status_color = COLORS["primary"]
-            status_icon = ft.Icons.SYNC
-        elif transfer.status == "completed":
-            status_color = COLORS["success"]
-            status_icon = ft.Icons.CHECK_CIRCLE
-        elif transfer.status == "failed":
-            status_color = COLORS["error"]
-            status_icon = ft.Icons.ERROR
-        elif transfer.status == "retrying":
-            status_color = COLORS["warning"]
-            status_icon = ft.Icons.REFRESH
-        elif transfer.status == "cancelled":
-            status_color = COLORS["warning"]
-            status_icon = ft.Icons.CANCEL
-
-        # Progress bar - indeterminate for tarring/extracting, determinate otherwise
-        is_indeterminate = transfer.status in ("tarring", "extracting")
-        progress_bar = ft.ProgressBar(
-            value=None if is_indeterminate else (
-                transfer.progress / 100 if transfer.is_active else (1 if transfer.status == "completed" else 0)
-            ),
-            color=status_color,
-            bgcolor=COLORS["surface"],
+        # Controls that change with the transfer state, filled in by update_from()
+        self._status_icon = ft.Icon(ft.Icons.HOURGLASS_EMPTY, size=16)
+        self._status_label = ft.Text(size=11)
+        self._progress_bar = ft.ProgressBar(
+            bgcolor=SURFACE,
             height=4,
             border_radius=2,
         )
-
-        # Speed and ETA
-        speed_eta_text = ""
-        if transfer.is_active and transfer.speed > 0:
-            speed_eta_text = f"{transfer.speed_text}"
-            if transfer.eta_text:
-                speed_eta_text += f" • {transfer.eta_text} remaining"
-
-        # Cancel button (only for active transfers)
-        cancel_btn = None
-        if transfer.is_active or transfer.status == "pending":
-            cancel_btn = ft.IconButton(
-                icon=ft.Icons.CLOSE,
-                icon_color=COLORS["text_secondary"],
-                icon_size=18,
-                tooltip="Cancel",
-                on_click=lambda e: self._on_cancel(transfer.id) if self._on_cancel else None,
-            )
+        self._progress_text = ft.Text(size=11, color=TEXT_SECONDARY)
+        self._speed_eta_text = ft.Text(size=11, color=TEXT_SECONDARY)
+        self._cancel_btn = ft.IconButton(
+            icon=ft.Icons.CLOSE,
+            icon_color=TEXT_SECONDARY,
+            icon_size=18,
+            tooltip="Cancel",
+            on_click=lambda e: self._on_cancel(self.transfer.id) if self._on_cancel else None,
+        )
+        self._error_text = ft.Text(
+            size=11,
+            color=ERROR,
+            max_lines=2,
+            overflow=ft.TextOverflow.ELLIPSIS,
+        )
 
         super().__init__(
             content=ft.Column(
                 [
                     ft.Row(
                         [
-                            ft.Icon(direction_icon, color=COLORS["primary"], size=20),
+                            ft.Icon(direction_icon, color=PRIMARY, size=20),
                             ft.Column(
                                 [
                                     ft.Text(
                                         transfer.filename,
                                         size=13,
                                         weight=ft.FontWeight.W_500,
-                                        color=COLORS["text"],
+                                        color=TEXT,
                                         max_lines=1,
                                         overflow=ft.TextOverflow.ELLIPSIS,
                                     ),
                                     ft.Text(
                                         direction_text,
                                         size=11,
-                                        color=COLORS["text_secondary"],
+                                        color=TEXT_SECONDARY,
                                     ),
                                 ],
                                 spacing=1,
@@ -186,50 +211,79 @@ class TransferCard(ft.Container):
                             ),
                             ft.Row(
                                 [
-                                    ft.Icon(status_icon, color=status_color, size=16),
-                                    ft.Text(
-                                        status_text,
-                                        size=11,
-                                        color=status_color,
-                                    ),
+                                    self._status_icon,
+                                    self._status_label,
                                 ],
                                 spacing=4,
                             ),
-                            cancel_btn if cancel_btn else ft.Container(),
+                            self._cancel_btn,
                         ],
                         spacing=10,
                     ),
-                    progress_bar,
+                    self._progress_bar,
                     ft.Row(
                         [
-                            ft.Text(
-                                transfer.progress_text,
-                                size=11,
-                                color=COLORS["text_secondary"],
-                            ),
-                            ft.Text(
-                                speed_eta_text,
-                                size=11,
-                                color=COLORS["text_secondary"],
-                            ) if speed_eta_text else ft.Container(),
+                            self._progress_text,
+                            self._speed_eta_text,
                         ],
                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                     ),
                     # Show error if failed
-                    ft.Text(
-                        transfer.error or "",
-                        size=11,
-                        color=COLORS["error"],
-                        max_lines=2,
-                        overflow=ft.TextOverflow.ELLIPSIS,
-                    ) if transfer.error else ft.Container(),
+                    self._error_text,
                 ],
                 spacing=8,
             ),
-            padding=ft.padding.all(12),
+            padding=_PAD_CARD,
             border_radius=8,
-            bgcolor=COLORS["surface_variant"],
+            bgcolor=SURFACE_VARIANT,
+        )
+
+        self.update_from(transfer)
+
+    def update_from(self, transfer: QueuedTransfer):
+        """Refresh the card in place from the transfer's current state."""
+        self.transfer = transfer
+
+        # Status-dependent styling only needs rewriting on a status transition
+        if transfer.status != self._last_status:
+            self._last_status = transfer.status
+            status_color, status_icon = _STATUS_STYLE.get(transfer.status, _DEFAULT_STATUS_STYLE)
+            status_text = _STATUS_LABELS.get(transfer.status) or transfer.status.title()
+
+            self._status_icon.name = status_icon
+            self._status_icon.color = status_color
+            self._status_label.value = status_text
+            self._status_label.color = status_color
+            self._progress_bar.color = status_color
+
+            # Cancel button (only for active transfers)
+            self._cancel_btn.visible = transfer.is_active or transfer.status == "pending"
+
+        # Progress bar - indeterminate for tarring/extracting, determinate otherwise
+        is_indeterminate = transfer.status in ("tarring", "extracting")
+        self._progress_bar.value = None if is_indeterminate else (
+            transfer.progress / 100 if transfer.is_active else (1 if transfer.status == "completed" else 0)
         )
+        self._progress_text.value = transfer.progress_text
+
+        # Speed and ETA
+        speed_eta_text = ""
+        if transfer.is_active and transfer.speed > 0:
+            # Only reformat when the speed or ETA moves to a different bucket
+            remaining = transfer.total_size - transfer.transferred_bytes
+            eta = int(remaining / transfer.speed) if remaining > 0 else -1
+            key = (int(transfer.speed) >> 10, eta)
+            if key != self._speed_eta_key:
+                self._speed_eta_key = key
+                self._speed_eta_str = transfer.speed_text
+                if transfer.eta_text:
+                    self._speed_eta_str += f" • {transfer.eta_text} remaining"
+            speed_eta_text = self._speed_eta_str
+        self._speed_eta_text.value = speed_eta_text
+        self._speed_eta_text.visible = bool(speed_eta_text)
+
+        self._error_text.value = transfer.error or ""
+        self._error_text.visible = bool(transfer.error)
 
 
 class LANTransferApp:
@@ -244,8 +298,28 @@ class LANTransferApp:
         # UI components
         self._devices_list: ft.Column | None = None
         self._transfers_list: ft.Column | None = None
+        self._empty_transfers: ft.Container | None = None
         self._status_text: ft.Text | None = None
         self._drop_zone: ft.Container | None = None
+        self._header: ft.Container | None = None
+        self._devices_panel: ft.Container | None = None
+        self._transfers_panel: ft.Container | None = None
+        self._status_bar: ft.Container | None = None
+        self._file_picker: ft.FilePicker | None = None
+        self._picker_dialog: ft.AlertDialog | None = None
+        self._downloads_dir: Path | None = None
+        self._dialog_closed = asyncio.Event()
+        self._device_cards: dict[Peer, DeviceCard] = {}
+        self._transfer_cards: dict[str, TransferCard] = {}
+        self._last_queue_sig: tuple = ()
+
+        # Pending page.update() flush, see _schedule_update
+        self._update_pending = False
+
+        # Service callbacks are queued here and applied in batches by _process_events
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._event_task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
 
     async def initialize(self):
         """Initialize the application."""
@@ -272,20 +346,88 @@ class LANTransferApp:
 
         # Build UI
         self._build_ui()
+        self._loop = asyncio.get_running_loop()
+        self._event_task = asyncio.create_task(self._process_events())
 
         # Start services
         await self._discovery.start()
         await self._transfer_manager.start()
 
-        # Update status
-        local_ip = get_local_ip()
+        # Update status; both helpers touch the network or filesystem, so keep them off the loop
+        local_ip, self._downloads_dir = await asyncio.gather(
+            asyncio.to_thread(get_local_ip),
+            asyncio.to_thread(get_downloads_dir),
+        )
         self._status_text.value = f"Ready • {local_ip}:{DEFAULT_PORT}"
         self.page.update()
 
     def _build_ui(self):
         """Build the main UI."""
-        # Header
-        header = ft.Container(
+        # Sections are built once and kept on self so page updates reuse the same controls
+        self._header = self._build_header()
+        self._devices_panel = self._build_devices_panel()
+        self._transfers_panel = self._build_transfers_panel()
+        self._drop_zone = self._build_drop_zone()
+        self._status_bar = self._build_status_bar()
+
+        # Main layout
+        main_content = ft.Container(
+            content=ft.Row(
+                [
+                    self._devices_panel,
+                    ft.Column(
+                        [
+                            self._transfers_panel,
+                            self._drop_zone,
+                        ],
+                        spacing=16,
+                        expand=True,
+                    ),
+                ],
+                spacing=16,
+                expand=True,
+            ),
+            padding=ft.padding.all(16),
+            expand=True,
+        )
+
+        # File picker
+        self._file_picker = ft.FilePicker(on_result=self._on_files_picked)
+        self.page.overlay.append(self._file_picker)
+
+        # Files/folder chooser, built once and reopened on every browse click
+        self._picker_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("What would you like to send?"),
+            content=ft.Text("Choose to send individual files or an entire folder."),
+            actions=[
+                ft.TextButton("Files", on_click=self._pick_files_action),
+                ft.TextButton("Folder", on_click=self._pick_folder_action),
+                ft.TextButton("Cancel", on_click=self._close_picker_dialog),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+            on_dismiss=self._on_picker_dismissed,
+        )
+
+        # Build page
+        self.page.add(
+            ft.Column(
+                [
+                    self._header,
+                    main_content,
+                    self._status_bar,
+                ],
+                spacing=0,
+                expand=True,
+            )
+        )
+
+        # Setup keyboard events
+        self.page.on_keyboard_event = self._handle_keyboard
+
+    def _build_header(self) -> ft.Container:
+        """Build the title bar with the app name and header actions."""
+        return ft.Container(
             content=ft.Row(
                 [
                     ft.Row(
@@ -318,17 +460,18 @@ class LANTransferApp:
                 ],
                 alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
             ),
-            padding=ft.padding.symmetric(horizontal=20, vertical=12),
+            padding=_PAD_HEADER,
             bgcolor=COLORS["surface"],
         )
 
-        # Devices panel
+    def _build_devices_panel(self) -> ft.Container:
+        """Build the nearby devices panel."""
         self._devices_list = ft.Column(
             spacing=8,
             scroll=ft.ScrollMode.AUTO,
         )
 
-        devices_panel = ft.Container(
+        return ft.Container(
             content=ft.Column(
                 [
                     ft.Row(
@@ -362,7 +505,8 @@ class LANTransferApp:
             border_radius=12,
         )
 
-        # Transfers panel
+    def _build_transfers_panel(self) -> ft.Container:
+        """Build the transfer queue panel with its empty state."""
         self._transfers_list = ft.Column(
             spacing=8,
             scroll=ft.ScrollMode.AUTO,
@@ -386,7 +530,7 @@ class LANTransferApp:
             expand=True,
         )
 
-        transfers_panel = ft.Container(
+        return ft.Container(
             content=ft.Column(
                 [
                     ft.Row(
@@ -423,8 +567,9 @@ class LANTransferApp:
             border_radius=12,
         )
 
-        # File selection zone
-        self._drop_zone = ft.Container(
+    def _build_drop_zone(self) -> ft.Container:
+        """Build the click-to-select file zone."""
+        return ft.Container(
             content=ft.Column(
                 [
                     ft.Icon(ft.Icons.FOLDER_OPEN, color=COLORS["text_secondary"], size=36),
@@ -445,21 +590,22 @@ class LANTransferApp:
                 spacing=8,
             ),
             height=100,
-            border=ft.border.all(2, COLORS["surface_variant"]),
+            border=_BORDER_DROPZONE_IDLE,
             border_radius=12,
             bgcolor=COLORS["surface"],
             alignment=ft.alignment.center,
             on_click=self._pick_files,
         )
 
-        # Status bar
+    def _build_status_bar(self) -> ft.Container:
+        """Build the bottom status bar."""
         self._status_text = ft.Text(
             "Starting...",
             size=12,
             color=COLORS["text_secondary"],
         )
 
-        status_bar = ft.Container(
+        return ft.Container(
             content=ft.Row(
                 [
                     ft.Icon(ft.Icons.CIRCLE, color=COLORS["success"], size=10),
@@ -471,88 +617,125 @@ class LANTransferApp:
             bgcolor=COLORS["surface"],
         )
 
-        # Main layout
-        main_content = ft.Container(
-            content=ft.Row(
-                [
-                    devices_panel,
-                    ft.Column(
-                        [
-                            transfers_panel,
-                            self._drop_zone,
-                        ],
-                        spacing=16,
-                        expand=True,
-                    ),
-                ],
-                spacing=16,
-                expand=True,
-            ),
-            padding=ft.padding.all(16),
-            expand=True,
-        )
-
-        # File picker
-        self._file_picker = ft.FilePicker(on_result=self._on_files_picked)
-        self.page.overlay.append(self._file_picker)
+    def _schedule_update(self):
+        """Request a page update, coalescing bursts of changes into a single flush."""
+        if self._update_pending:
+            return
+        self._update_pending = True
+        self.page.run_task(self._flush_update)
 
-        # Build page
-        self.page.add(
-            ft.Column(
-                [
-                    header,
-                    main_content,
-                    status_bar,
-                ],
-                spacing=0,
-                expand=True,
-            )
-        )
+    async def _flush_update(self):
+        """Send all pending UI changes to the client."""
+        await asyncio.sleep(UI_UPDATE_INTERVAL)
+        self._update_pending = False
+        try:
+            self.page.update()
+        except RuntimeError:
+            # Page not attached (yet or any more); the next flush will catch up
+            pass
 
-        # Setup keyboard events
-        self.page.on_keyboard_event = self._handle_keyboard
+    def _post_event(self, kind: str, payload: object = None):
+        """Queue an event for _process_events; safe to call from handler threads."""
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._events.put_nowait, (kind, payload))
 
     def _on_peer_added(self, peer: Peer):
         """Called when a new peer is discovered."""
-        if self._devices_list:
-            card = DeviceCard(peer, self._on_device_selected)
-            self._devices_list.controls.append(card)
-            self.page.update()
+        self._post_event("peer_added", peer)
 
     def _on_peer_removed(self, peer: Peer):
         """Called when a peer goes offline."""
+        self._post_event("peer_removed", peer)
+
+    def _on_queue_updated(self):
+        """Called when the transfer queue changes."""
+        self._post_event("queue_updated")
+
+    def _on_transfer_done(self, transfer: QueuedTransfer):
+        """Called when a transfer completes or fails."""
+        self._post_event("queue_updated")
+
+    async def _process_events(self):
+        """Apply queued service events, draining each burst as a single batch."""
+        while True:
+            batch = [await self._events.get()]
+            while True:
+                try:
+                    batch.append(self._events.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                self._apply_events(batch)
+            except Exception:
+                # Keep the consumer alive for the next batch
+                logger.exception("Failed to apply UI events")
+
+    def _apply_events(self, batch: list[tuple[str, object]]):
+        """Apply a batch of events, keeping only the last one per peer."""
+        peer_events: dict[Peer, str] = {}
+        queue_updated = False
+        for kind, payload in batch:
+            if kind == "queue_updated":
+                queue_updated = True
+            else:
+                peer_events.pop(payload, None)
+                peer_events[payload] = kind
+
+        for peer, kind in peer_events.items():
+            if kind == "peer_added":
+                self._add_device(peer)
+            else:
+                self._remove_device(peer)
+
+        if queue_updated:
+            self._refresh_transfers()
+
+    def _add_device(self, peer: Peer):
+        """Show a card for a discovered peer."""
+        if self._devices_list:
+            card = DeviceCard(peer, self._on_device_selected, self._schedule_update)
+            stale = self._device_cards.get(peer)
+            if stale:
+                self._devices_list.controls.remove(stale)
+            self._device_cards[peer] = card
+            self._devices_list.controls.append(card)
+            self._schedule_update()
+
+    def _remove_device(self, peer: Peer):
+        """Drop the card of a peer that went offline."""
         if self._devices_list:
-            self._devices_list.controls = [
-                c for c in self._devices_list.controls
-                if not (isinstance(c, DeviceCard) and c.peer == peer)
-            ]
+            card = self._device_cards.pop(peer, None)
+            if card:
+                self._devices_list.controls.remove(card)
             if self._selected_peer == peer:
                 self._selected_peer = None
                 self._update_drop_zone()
-            self.page.update()
+            self._schedule_update()
 
     def _on_device_selected(self, peer: Peer | None):
         """Called when a device is selected/deselected."""
+        if peer == self._selected_peer:
+            return
         self._selected_peer = peer
         self._update_drop_zone()
-        self.page.update()
+        self._schedule_update()
 
     def _update_drop_zone(self):
         """Update the drop zone based on selection state."""
         if self._selected_peer:
-            self._drop_zone.border = ft.border.all(2, COLORS["primary"])
-            self._drop_zone.content.controls[2].value = f"Send to {self._selected_peer.name}"
+            border = _BORDER_DROPZONE_ACTIVE
+            hint = f"Send to {self._selected_peer.name}"
         else:
-            self._drop_zone.border = ft.border.all(2, COLORS["surface_variant"])
-            self._drop_zone.content.controls[2].value = "Select a device first"
-
-    def _on_queue_updated(self):
-        """Called when the transfer queue changes."""
-        self._refresh_transfers()
+            border = _BORDER_DROPZONE_IDLE
+            hint = "Select a device first"
 
-    def _on_transfer_done(self, transfer: QueuedTransfer):
-        """Called when a transfer completes or fails."""
-        self._refresh_transfers()
+        # Only write what changed so untouched properties stay out of the next diff
+        if self._drop_zone.border is not border:
+            self._drop_zone.border = border
+        hint_text = self._drop_zone.content.controls[2]
+        if hint_text.value != hint:
+            hint_text.value = hint
 
     def _refresh_transfers(self):
         """Refresh the transfers list."""
@@ -561,29 +744,51 @@ class LANTransferApp:
 
         queue = self._transfer_manager.queue
 
-        # Show/hide empty state
-        self._empty_transfers.visible = len(queue) == 0
-        self._transfers_list.visible = len(queue) > 0
-
-        # Update transfers
-        self._transfers_list.controls = [
-            TransferCard(t, self._cancel_transfer)
-            for t in queue
-        ]
-
-        try:
-            self.page.update()
-        except Exception:
-            pass
+        # Nothing visible changed since the last render (progress bucketed to whole percent)
+        sig = tuple((t.id, t.status, int(t.progress)) for t in queue)
+        if sig == self._last_queue_sig:
+            return
+        self._last_queue_sig = sig
+
+        # Show/hide empty state, touching the controls only when it flips
+        empty = len(queue) == 0
+        if self._empty_transfers.visible != empty:
+            self._empty_transfers.visible = empty
+        if self._transfers_list.visible == empty:
+            self._transfers_list.visible = not empty
+
+        # Drop cards for transfers that left the queue
+        cards = self._transfer_cards
+        queued_ids = {t.id for t in queue}
+        for transfer_id in [tid for tid in cards if tid not in queued_ids]:
+            self._transfers_list.controls.remove(cards.pop(transfer_id))
+
+        # Update surviving cards in place and append new ones
+        for t in queue:
+            card = cards.get(t.id)
+            if card is None:
+                card = TransferCard(t, self._cancel_transfer)
+                cards[t.id] = card
+                self._transfers_list.controls.append(card)
+            else:
+                card.update_from(t)
+
+        self._schedule_update()
 
     def _refresh_devices(self, e=None):
         """Refresh the devices list."""
-        if self._devices_list and self._discovery:
-            self._devices_list.controls = [
-                DeviceCard(peer, self._on_device_selected)
-                for peer in self._discovery.peers
-            ]
-            self.page.update()
+        if not self._devices_list or not self._discovery:
+            return
+
+        # Apply only the difference against the cards already shown
+        peers = self._discovery.peers
+        current = set(self._device_cards)
+        wanted = set(peers)
+        for peer in current - wanted:
+            self._remove_device(peer)
+        for peer in peers:
+            if peer not in current:
+                self._add_device(peer)
 
     def _pick_files(self, e=None):
         """Open file picker dialog."""
@@ -601,29 +806,29 @@ class LANTransferApp:
 
     def _show_picker_dialog(self):
         """Show dialog to choose between file or folder picker."""
-        self._picker_dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("What would you like to send?"),
-            content=ft.Text("Choose to send individual files or an entire folder."),
-            actions=[
-                ft.TextButton("Files", on_click=self._pick_files_action),
-                ft.TextButton("Folder", on_click=self._pick_folder_action),
-                ft.TextButton("Cancel", on_click=self._close_picker_dialog),
-            ],
-            actions_alignment=ft.MainAxisAlignment.END,
-        )
-
         self.page.open(self._picker_dialog)
 
     def _close_picker_dialog(self, e=None):
         """Close the picker dialog."""
-        if hasattr(self, '_picker_dialog') and self._picker_dialog:
+        if self._picker_dialog:
             self.page.close(self._picker_dialog)
 
+    async def _on_picker_dismissed(self, e):
+        """Signal that the picker dialog has finished closing."""
+        self._dialog_closed.set()
+
+    async def _wait_picker_closed(self):
+        """Close the picker dialog and wait until the client reports it gone."""
+        self._dialog_closed.clear()
+        self._close_picker_dialog()
+        try:
+            await asyncio.wait_for(self._dialog_closed.wait(), timeout=0.25)
+        except TimeoutError:
+            pass
+
     async def _pick_files_action_async(self):
         """Handle picking files asynchronously."""
-        self._close_picker_dialog()
-        await asyncio.sleep(0.1)  # Small delay to let dialog close
+        await self._wait_picker_closed()
         self._file_picker.pick_files(
             allow_multiple=True,
             dialog_title="Select files to send",
@@ -635,8 +840,7 @@ class LANTransferApp:
 
     async def _pick_folder_action_async(self):
         """Handle picking a folder asynchronously."""
-        self._close_picker_dialog()
-        await asyncio.sleep(0.1)  # Small delay to let dialog close
+        await self._wait_picker_closed()
         self._file_picker.get_directory_path(
             dialog_title="Select folder to send",
         )
@@ -654,16 +858,17 @@ class LANTransferApp:
         if e.path:
             folder_path = Path(e.path)
             if folder_path.is_dir():
-                self._transfer_manager.queue_send(folder_path, self._selected_peer)
+                self.page.run_task(
+                    self._transfer_manager.queue_send, folder_path, self._selected_peer
+                )
             return
 
         # Handle file selection
         if not e.files:
             return
 
-        for file in e.files:
-            file_path = Path(file.path)
-            self._transfer_manager.queue_send(file_path, self._selected_peer)
+        paths = [Path(file.path) for file in e.files]
+        self.page.run_task(self._transfer_manager.queue_send_many, paths, self._selected_peer)
 
     def _cancel_transfer(self, transfer_id: str):
         """Cancel a transfer."""
@@ -677,14 +882,22 @@ class LANTransferApp:
 
     def _open_downloads(self, e=None):
         """Open the downloads folder."""
-        import subprocess
-        import sys
-
-        downloads = get_downloads_dir()
+        downloads = self._downloads_dir or get_downloads_dir()
         if sys.platform == "darwin":
-            subprocess.run(["open", str(downloads)])
+            cmd = ["open", str(downloads)]
         elif sys.platform == "linux":
-            subprocess.run(["xdg-open", str(downloads)])
+            cmd = ["xdg-open", str(downloads)]
+        else:
+            return
+
+        # Detach the launcher so a slow file manager start never blocks the UI
+        subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
 
     def _handle_keyboard(self, e: ft.KeyboardEvent):
         """Handle keyboard events."""
@@ -692,6 +905,8 @@ class LANTransferApp:
 
     async def cleanup(self):
         """Clean up resources."""
+        if self._event_task:
+            self._event_task.cancel()
         if self._transfer_manager:
             await self._transfer_manager.stop()
         if self._discovery:
@@ -710,8 +925,26 @@ async def main_async(page: ft.Page):
     page.on_close = on_close
 
 
+def _setup_logging() -> None:
+    """Log warnings and errors to a file in the data dir, and to stderr when there is one."""
+    # Windowed builds have no console, so the file is the only place errors survive
+    handlers: list[logging.Handler] = [
+        logging.handlers.RotatingFileHandler(
+            get_data_dir() / "lantransfer.log", maxBytes=1024 * 1024, backupCount=1
+        )
+    ]
+    if sys.stderr:
+        handlers.append(logging.StreamHandler())
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=handlers,
+    )
+
+
 def run_app() -> int:
     """Run the application."""
+    _setup_logging()
     ft.app(target=main_async)
     return 0
 
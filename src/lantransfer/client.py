@@ -1,9 +1,16 @@
 """HTTP client for sending file transfers with retry support."""
 
 import asyncio
+import hashlib
+import itertools
 import os
+import queue
+import shutil
+import stat
 import tarfile
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
@@ -15,11 +22,28 @@ from lantransfer.utils import (
     CHUNK_SIZE,
     CONNECTION_TIMEOUT,
     INITIAL_RETRY_DELAY,
-    MAX_RETRY_DELAY,
-    get_file_hash_async,
-    get_folder_size,
+    LEGACY_CHUNK_SIZE,
+    MIN_TRANSFER_RATE,
+    PROGRESS_CALLBACK_INTERVAL,
+    get_file_hash,
+    new_sha256,
+    next_retry_delay,
 )
 
+# System tar is several times faster than the pure-Python tarfile module
+TAR_BIN = shutil.which("tar")
+# Parallel gzip, used for "gz" folder archives when installed
+PIGZ_BIN = shutil.which("pigz")
+# Multi-threaded zstd, required for "zst" folder archives
+ZSTD_BIN = shutil.which("zstd")
+
+# Folder archive suffix per compression mode; the receiver extracts all of them
+TAR_SUFFIXES = {
+    "raw": ".tar",
+    "gz": ".tar.gz",
+    "zst": ".tar.zst",
+}
+
 
 class TransferStatus(Enum):
     """Status of a file transfer."""
@@ -33,6 +57,21 @@ class TransferStatus(Enum):
     CANCELLED = "cancelled"
 
 
+def _hash_prefix(file_path: Path, length: int) -> "hashlib._Hash":
+    """Return a SHA-256 hasher fed with the first length bytes of a file."""
+    hasher = new_sha256()
+    # One reused buffer; readinto avoids allocating a new bytes object per block
+    buf = memoryview(bytearray(min(CHUNK_SIZE, length)))
+    with open(file_path, "rb", buffering=0) as f:
+        while length > 0:
+            n = f.readinto(buf[:length])
+            if not n:
+                break
+            hasher.update(buf[:n])
+            length -= n
+    return hasher
+
+
 @dataclass
 class OutgoingTransfer:
     """Represents an outgoing file transfer."""
@@ -47,10 +86,16 @@ class OutgoingTransfer:
     error: str | None = None
     retry_count: int = 0
     speed: float = 0.0  # bytes per second
+    chunk_size: int = CHUNK_SIZE  # Agreed with the receiver in the init handshake
+    in_flight_chunks: int = 1  # Chunks uploaded concurrently, also agreed in the handshake
     # Internal: the original path used to queue this transfer (for folder transfers, this is the folder path)
     original_path: Path | None = None
-    # Internal: the key used in _cancel_flags and _active_transfers
-    _transfer_key: str = ""
+    # Opaque caller tag passed to send_path, echoed back for matching in callbacks
+    tag: str = ""
+    # Internal: key in TransferClient._active_transfers
+    _local_id: int = 0
+    # Internal: set to ask the upload loop to stop
+    _cancel_event: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
 
     @property
     def progress(self) -> float:
@@ -70,27 +115,62 @@ class TransferClient:
     """Client for sending files to peers."""
 
     max_retries: int = 5
-    chunk_size: int = CHUNK_SIZE
+    chunk_size: int = CHUNK_SIZE  # At most MAX_CHUNK_BYTES, the receiver's body limit
     timeout: int = CONNECTION_TIMEOUT
+    # Verify transfers with SHA-256; turn off on trusted LANs to skip hashing entirely
+    verify: bool = True
+    # Chunk POSTs kept on the wire at once for a single file (1 for 1.0 receivers)
+    in_flight_chunks: int = 4
+    # Folder archive compression: "raw" (fastest on a LAN), "gz" or "zst" (needs tar and zstd)
+    compression: str = "raw"
 
     on_transfer_started: Callable[[OutgoingTransfer], None] | None = None
     on_transfer_progress: Callable[[OutgoingTransfer], None] | None = None
     on_transfer_completed: Callable[[OutgoingTransfer], None] | None = None
     on_transfer_failed: Callable[[OutgoingTransfer, str], None] | None = None
     on_transfer_cancelled: Callable[[OutgoingTransfer], None] | None = None
-    on_tarring_started: Callable[[Path], None] | None = None
-    on_tarring_completed: Callable[[Path], None] | None = None
+    # Tarring callbacks get the folder path and the tag passed to send_path
+    on_tarring_started: Callable[[Path, str], None] | None = None
+    on_tarring_completed: Callable[[Path, str], None] | None = None
 
-    _active_transfers: dict[str, OutgoingTransfer] = field(
+    _active_transfers: dict[int, OutgoingTransfer] = field(
         default_factory=dict, init=False, repr=False
     )
-    _cancel_flags: dict[str, bool] = field(default_factory=dict, init=False, repr=False)
+    _ids: itertools.count = field(
+        default_factory=lambda: itertools.count(1), init=False, repr=False
+    )
+    _session: aiohttp.ClientSession | None = field(default=None, init=False, repr=False)
+    # Own thread for the tarfile fallback so it never ties up the default executor
+    _tar_executor: ThreadPoolExecutor | None = field(default=None, init=False, repr=False)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=0,
+                    limit_per_host=self.max_retries * 2,
+                    keepalive_timeout=60,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP session and its pooled connections."""
+        if self._session:
+            await self._session.close()
+            self._session = None
+        if self._tar_executor:
+            self._tar_executor.shutdown(wait=False, cancel_futures=True)
+            self._tar_executor = None
 
     async def send_path(
         self,
         path: Path,
         peer_url: str,
         resume_id: str | None = None,
+        tag: str = "",
     ) -> OutgoingTransfer:
         """
         Send a file or folder to a peer.
@@ -99,22 +179,26 @@ class TransferClient:
             path: Path to the file or folder to send
             peer_url: Base URL of the peer (e.g., http://192.168.1.42:8765)
             resume_id: Optional transfer ID to resume an interrupted transfer
+            tag: Caller tag set on the OutgoingTransfer and passed to tarring callbacks
         
         Returns:
             OutgoingTransfer object with final status
         """
-        if not path.exists():
-            raise FileNotFoundError(f"Path not found: {path}")
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Path not found: {path}") from None
 
-        if path.is_dir():
-            return await self._send_folder(path, peer_url)
+        if stat.S_ISDIR(st.st_mode):
+            return await self._send_folder(path, peer_url, tag)
         else:
-            return await self.send_file(path, peer_url, resume_id)
+            return await self.send_file(path, peer_url, resume_id, tag=tag)
 
     async def _send_folder(
         self,
         folder_path: Path,
         peer_url: str,
+        tag: str = "",
     ) -> OutgoingTransfer:
         """
         Send a folder by compressing it to a tarball.
@@ -122,52 +206,104 @@ class TransferClient:
         Args:
             folder_path: Path to the folder to send
             peer_url: Base URL of the peer
+            tag: Caller tag, see send_path
         
         Returns:
             OutgoingTransfer object with final status
         """
-        # Create a temporary tarball (uncompressed for speed)
-        temp_dir = tempfile.mkdtemp()
-        tarball_name = f"{folder_path.name}.tar"
-        tarball_path = Path(temp_dir) / tarball_name
+        # Create a temporary tarball (uncompressed by default for speed); the
+        # directory and everything in it go away however the send ends
+        with tempfile.TemporaryDirectory(prefix="lantransfer-") as temp_dir:
+            compression = self.compression
+            if compression == "zst" and not (TAR_BIN and ZSTD_BIN):
+                compression = "raw"  # tarfile can't write zstd; send uncompressed instead
+            tarball_name = f"{folder_path.name}{TAR_SUFFIXES[compression]}"
+            tarball_path = Path(temp_dir) / tarball_name
 
-        try:
             # Notify tarring started
             if self.on_tarring_started:
-                self.on_tarring_started(folder_path)
+                self.on_tarring_started(folder_path, tag)
             
-            # Create tarball in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                self._create_tarball,
-                folder_path,
-                tarball_path,
-            )
+            tarball_hash = await self._create_tarball(folder_path, tarball_path, compression)
             
             # Notify tarring completed
             if self.on_tarring_completed:
-                self.on_tarring_completed(folder_path)
+                self.on_tarring_completed(folder_path, tag)
 
             # Send the tarball, passing the original folder path for matching
-            transfer = await self.send_file(tarball_path, peer_url, original_path=folder_path)
+            transfer = await self.send_file(
+                tarball_path, peer_url, original_path=folder_path, file_hash=tarball_hash, tag=tag
+            )
 
             # Update filename to show it was a folder
             transfer.file_path = folder_path
 
             return transfer
 
-        finally:
-            # Clean up temp file
-            if tarball_path.exists():
-                tarball_path.unlink()
-            if Path(temp_dir).exists():
-                os.rmdir(temp_dir)
+    async def _create_tarball(self, folder_path: Path, tarball_path: Path, compression: str) -> str:
+        """Create a tarball of a folder and return its SHA-256.
+
+        The archive is hashed as tar writes it, so send_file does not need a
+        second read pass over the tarball before uploading.
+        """
+        import aiofiles
+
+        if not TAR_BIN:
+            # No tar binary (e.g. stripped-down systems): fall back to tarfile in a thread
+            if self._tar_executor is None:
+                self._tar_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="lantransfer-tar"
+                )
+            return await asyncio.get_running_loop().run_in_executor(
+                self._tar_executor, self._write_tarball, folder_path, tarball_path, compression
+            )
+
+        args = ["-C", str(folder_path.parent), "-cf", "-"]
+        if compression == "gz":
+            args += ["--use-compress-program", PIGZ_BIN] if PIGZ_BIN else ["-z"]
+        elif compression == "zst":
+            args += ["--use-compress-program", f"{ZSTD_BIN} -T0"]
+
+        proc = await asyncio.create_subprocess_exec(
+            TAR_BIN, *args, folder_path.name,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            # Keep macOS bsdtar from adding AppleDouble ._ entries
+            env={**os.environ, "COPYFILE_DISABLE": "1"},
+        )
+        # Drain stderr concurrently so a chatty tar cannot block on a full pipe
+        stderr_task = asyncio.create_task(proc.stderr.read())
+        hasher = new_sha256()
+        try:
+            async with aiofiles.open(tarball_path, "wb") as f:
+                while chunk := await proc.stdout.read(self.chunk_size):
+                    hasher.update(chunk)
+                    await f.write(chunk)
+            stderr = await stderr_task
+            await proc.wait()
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+            stderr_task.cancel()
+            raise
 
-    def _create_tarball(self, folder_path: Path, tarball_path: Path) -> None:
-        """Create an uncompressed tarball of a folder (faster than gzip)."""
-        with tarfile.open(tarball_path, "w:") as tar:
-            tar.add(folder_path, arcname=folder_path.name)
+        if proc.returncode != 0:
+            raise RuntimeError(f"tar failed: {stderr.decode(errors='replace').strip()}")
+        return hasher.hexdigest()
+
+    def _write_tarball(self, folder_path: Path, tarball_path: Path, compression: str) -> str:
+        """Create a tarball with the tarfile module and return its SHA-256."""
+        # Only regular files and directories; links and device nodes are left out
+        def keep(info: tarfile.TarInfo) -> tarfile.TarInfo | None:
+            return info if info.isfile() or info.isdir() else None
+
+        # tarfile writes in 512-byte records; a 1 MiB file buffer batches them
+        extra = {"compresslevel": 6} if compression == "gz" else {}
+        with open(tarball_path, "wb", buffering=1 << 20) as f:
+            mode = "w:gz" if compression == "gz" else "w:"
+            with tarfile.open(fileobj=f, mode=mode, format=tarfile.PAX_FORMAT, **extra) as tar:
+                tar.add(folder_path, arcname=folder_path.name, filter=keep)
+        return get_file_hash(tarball_path)
 
     async def send_file(
         self,
@@ -175,6 +311,8 @@ class TransferClient:
         peer_url: str,
         resume_id: str | None = None,
         original_path: Path | None = None,
+        file_hash: str | None = None,
+        tag: str = "",
     ) -> OutgoingTransfer:
         """
         Send a file to a peer.
@@ -184,74 +322,83 @@ class TransferClient:
             peer_url: Base URL of the peer (e.g., http://192.168.1.42:8765)
             resume_id: Optional transfer ID to resume an interrupted transfer
             original_path: For folder transfers, the original folder path (used for matching)
+            file_hash: SHA-256 of the file if already known; skips re-hashing it
+            tag: Caller tag, see send_path
         
         Returns:
             OutgoingTransfer object with final status
         """
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        # One stat call covers existence, type and size
+        try:
+            st = file_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
 
-        if not file_path.is_file():
+        if not stat.S_ISREG(st.st_mode):
             raise ValueError(f"Not a file: {file_path}")
 
         peer_url = peer_url.rstrip("/")
-        
-        # Use original_path for the transfer key if provided (folder transfers)
-        # This allows proper matching and cancellation
-        key_path = original_path if original_path else file_path
-        transfer_key = f"{peer_url}:{key_path}"
-        
-        # Create transfer object
+
+        # Create transfer object; original_path (the folder for folder transfers)
+        # is what callers match on when cancelling
         transfer = OutgoingTransfer(
             file_path=file_path,
             peer_url=peer_url,
-            total_size=file_path.stat().st_size,
+            total_size=st.st_size,
             original_path=original_path if original_path else file_path,
-            _transfer_key=transfer_key,
+            tag=tag,
+            _local_id=next(self._ids),
         )
 
-        self._active_transfers[transfer_key] = transfer
-        self._cancel_flags[transfer_key] = False
+        self._active_transfers[transfer._local_id] = transfer
 
         try:
             # Check for early cancellation before starting
-            if self._cancel_flags.get(transfer_key, False):
+            if transfer._cancel_event.is_set():
                 transfer.status = TransferStatus.CANCELLED
                 if self.on_transfer_cancelled:
                     self.on_transfer_cancelled(transfer)
                 return transfer
             
-            # Calculate file hash
+            # Without a known hash, the file is hashed as it is uploaded (see _send_chunks)
             transfer.status = TransferStatus.CONNECTING
-            transfer.file_hash = await get_file_hash_async(file_path)
+            transfer.file_hash = (file_hash or "") if self.verify else ""
 
             if self.on_transfer_started:
                 self.on_transfer_started(transfer)
 
-            # Initialize transfer with peer
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=self.timeout)
-            ) as session:
-                init_response = await self._init_transfer(session, transfer, resume_id)
-
-                if not init_response:
-                    return transfer
+            # Initialize transfer with peer, reusing pooled keep-alive connections
+            session = await self._get_session()
+            init_response = await self._init_transfer(session, transfer, resume_id)
 
-                transfer.transfer_id = init_response["transfer_id"]
-                resume_offset = init_response.get("resume_offset", 0)
-
-                if resume_offset > 0:
-                    transfer.sent_bytes = resume_offset
-
-                # Send file chunks
-                await self._send_chunks(session, transfer)
+            if not init_response:
+                return transfer
 
-                # Finalize transfer
-                if transfer.status == TransferStatus.TRANSFERRING:
-                    await self._complete_transfer(session, transfer)
-                elif transfer.status == TransferStatus.CANCELLED:
-                    if self.on_transfer_cancelled:
-                        self.on_transfer_cancelled(transfer)
+            transfer.transfer_id = init_response["transfer_id"]
+            resume_offset = init_response.get("resume_offset", 0)
+
+            if resume_offset > 0:
+                transfer.sent_bytes = resume_offset
+
+            # Receivers that predate large chunks don't announce a limit; they reject
+            # bodies of 2MB or more and any out-of-order chunk, so talk to them with the
+            # old chunk size one chunk at a time
+            if "max_chunk_size" in init_response:
+                transfer.chunk_size = min(self.chunk_size, init_response["max_chunk_size"])
+                transfer.in_flight_chunks = self.in_flight_chunks
+            else:
+                transfer.chunk_size = min(self.chunk_size, LEGACY_CHUNK_SIZE)
+                transfer.in_flight_chunks = 1
+
+            # Send file chunks
+            await self._send_chunks(session, transfer)
+
+            # Finalize transfer
+            if transfer.status == TransferStatus.TRANSFERRING:
+                await self._complete_transfer(session, transfer)
+            elif transfer.status == TransferStatus.CANCELLED:
+                if self.on_transfer_cancelled:
+                    self.on_transfer_cancelled(transfer)
 
         except asyncio.CancelledError:
             transfer.status = TransferStatus.CANCELLED
@@ -264,10 +411,7 @@ class TransferClient:
             if self.on_transfer_failed:
                 self.on_transfer_failed(transfer, str(e))
         finally:
-            if transfer_key in self._active_transfers:
-                del self._active_transfers[transfer_key]
-            if transfer_key in self._cancel_flags:
-                del self._cancel_flags[transfer_key]
+            self._active_transfers.pop(transfer._local_id, None)
 
         return transfer
 
@@ -277,19 +421,20 @@ class TransferClient:
         Returns True if a transfer was found and marked for cancellation.
         """
         peer_url = peer_url.rstrip("/")
-        transfer_key = f"{peer_url}:{file_path}"
-        if transfer_key in self._cancel_flags:
-            self._cancel_flags[transfer_key] = True
-            return True
+        for transfer in self._active_transfers.values():
+            if transfer.peer_url == peer_url and transfer.original_path == file_path:
+                transfer._cancel_event.set()
+                return True
         return False
     
-    def cancel_transfer_by_key(self, transfer_key: str) -> bool:
-        """Cancel an ongoing transfer by its internal key.
+    def cancel_transfer_by_id(self, local_id: int) -> bool:
+        """Cancel an ongoing transfer by its internal id.
         
         Returns True if a transfer was found and marked for cancellation.
         """
-        if transfer_key in self._cancel_flags:
-            self._cancel_flags[transfer_key] = True
+        transfer = self._active_transfers.get(local_id)
+        if transfer:
+            transfer._cancel_event.set()
             return True
         return False
 
@@ -305,6 +450,7 @@ class TransferClient:
             "filename": transfer.file_path.name,
             "size": transfer.total_size,
             "hash": transfer.file_hash,
+            "verify": self.verify,
         }
         if resume_id:
             data["resume_id"] = resume_id
@@ -340,94 +486,237 @@ class TransferClient:
         session: aiohttp.ClientSession,
         transfer: OutgoingTransfer,
     ) -> None:
-        """Send file chunks with retry support."""
-        import aiofiles
+        """Send file chunks with retry support.
 
+        A dedicated reader thread reads (and hashes, if needed) chunks in order
+        into a bounded window that transfer.in_flight_chunks upload workers drain, so
+        several POSTs are on the wire at once. The receiver holds each chunk
+        until its predecessors land.
+        """
         transfer.status = TransferStatus.TRANSFERRING
         url = f"{transfer.peer_url}/transfer/chunk"
-        transfer_key = transfer._transfer_key
-
-        retry_delay = INITIAL_RETRY_DELAY
-        last_progress_time = asyncio.get_event_loop().time()
-        last_sent_bytes = transfer.sent_bytes
-
-        async with aiofiles.open(transfer.file_path, "rb") as f:
-            await f.seek(transfer.sent_bytes)
-
-            while transfer.sent_bytes < transfer.total_size:
-                # Check for cancellation
-                if self._cancel_flags.get(transfer_key, False):
-                    transfer.status = TransferStatus.CANCELLED
-                    return
-
-                chunk = await f.read(self.chunk_size)
-                if not chunk:
-                    break
-
-                chunk_start = transfer.sent_bytes
-                chunk_end = transfer.sent_bytes + len(chunk) - 1
-
-                headers = {
-                    "X-Transfer-ID": transfer.transfer_id,
-                    "Content-Range": f"bytes {chunk_start}-{chunk_end}/{transfer.total_size}",
-                    "Content-Type": "application/octet-stream",
-                }
+        cancel_event = transfer._cancel_event
+        # Only Content-Range changes between chunks
+        base_headers = {
+            "X-Transfer-ID": transfer.transfer_id,
+            "Content-Type": "application/octet-stream",
+        }
 
-                success = False
-                for attempt in range(self.max_retries + 1):
-                    try:
-                        async with session.post(
-                            url, data=chunk, headers=headers
-                        ) as response:
-                            if response.status == 200:
-                                success = True
-                                transfer.retry_count = 0
-                                retry_delay = INITIAL_RETRY_DELAY
-
-                                transfer.sent_bytes += len(chunk)
-
-                                # Calculate speed
-                                current_time = asyncio.get_event_loop().time()
-                                time_diff = current_time - last_progress_time
-                                if time_diff > 0.5:  # Update speed every 0.5 seconds
-                                    bytes_diff = transfer.sent_bytes - last_sent_bytes
-                                    transfer.speed = bytes_diff / time_diff
-                                    last_progress_time = current_time
-                                    last_sent_bytes = transfer.sent_bytes
-
-                                if self.on_transfer_progress:
-                                    self.on_transfer_progress(transfer)
+        def chunk_timeout(chunk_end: int) -> aiohttp.ClientTimeout:
+            """Timeouts for one chunk POST.
+
+            Connect and response stalls are caught after self.timeout. The total
+            allows for this chunk and the unacknowledged ones ahead of it, which
+            the receiver waits for, at MIN_TRANSFER_RATE; that outlasts the
+            receiver's ordering wait and lets slow but steady links through.
+            """
+            pending = chunk_end + 1 - transfer.sent_bytes
+            return aiohttp.ClientTimeout(
+                total=self.timeout + pending / MIN_TRANSFER_RATE,
+                sock_connect=self.timeout,
+                sock_read=self.timeout,
+            )
 
+        loop = asyncio.get_event_loop()
+        last_progress_time = loop.time()
+        last_sent_bytes = transfer.sent_bytes
+        last_callback_time = 0.0
+        stopped = False  # set once a worker fails or sees a cancellation
+
+        window: asyncio.Queue = asyncio.Queue()
+
+        # Fixed set of read buffers recycled across chunks: no 16 MiB allocation (and
+        # page faulting) per chunk, and it bounds memory to in_flight_chunks + 1 chunks.
+        # A thread-safe queue, since the reader thread takes from it
+        free_buffers: queue.SimpleQueue = queue.SimpleQueue()
+        for _ in range(transfer.in_flight_chunks + 1):
+            free_buffers.put(bytearray(transfer.chunk_size))
+
+        read_done = loop.create_future()
+
+        def finish_read(exc: BaseException | None) -> None:
+            if read_done.done():
+                return
+            if exc is None:
+                read_done.set_result(None)
+            else:
+                read_done.set_exception(exc)
+
+        def read_ahead(hasher) -> None:
+            """Fill buffers from disk on a dedicated thread, one loop hop per chunk."""
+            exc = None
+            try:
+                with open(transfer.file_path, "rb", buffering=0) as f:
+                    f.seek(transfer.sent_bytes)
+                    offset = transfer.sent_bytes
+                    while offset < transfer.total_size and not stopped:
+                        buf = free_buffers.get()
+                        if buf is None:  # woken up because the send is over
+                            break
+                        # readinto fills the recycled buffer directly, without a new bytes object
+                        n = f.readinto(buf)
+                        if not n:
+                            break
+                        chunk = memoryview(buf)[:n]
+                        if hasher:
+                            # hashlib drops the GIL for large buffers, so this overlaps the POSTs
+                            hasher.update(chunk)
+                        loop.call_soon_threadsafe(window.put_nowait, (offset, buf, chunk))
+                        offset += n
+            except BaseException as e:
+                exc = e
+            try:
+                loop.call_soon_threadsafe(finish_read, exc)
+            except RuntimeError:
+                pass  # loop already closed on shutdown
+
+        def stop() -> None:
+            """End the upload: abort the other workers' POSTs and release the reader."""
+            nonlocal stopped
+            stopped = True
+            current = asyncio.current_task()
+            for worker in workers:
+                if worker is not current:
+                    worker.cancel()  # closes its response; its buffer goes back in finally
+            free_buffers.put(None)
+
+        def check_stop() -> bool:
+            """Whether the upload is over, acting on a pending cancellation first."""
+            if cancel_event.is_set() and not stopped:
+                transfer.status = TransferStatus.CANCELLED
+                stop()
+            return stopped
+
+        async def watch_cancel() -> None:
+            await cancel_event.wait()
+            check_stop()
+
+        async def upload_worker() -> None:
+            nonlocal last_progress_time, last_sent_bytes, last_callback_time
+            retry_delay = INITIAL_RETRY_DELAY
+
+            while (item := await window.get()) is not None:
+                chunk_start, buf, chunk = item
+                try:
+                    if check_stop():
+                        continue  # keep draining so the reader never blocks
+
+                    chunk_end = chunk_start + len(chunk) - 1
+
+                    headers = {
+                        **base_headers,
+                        "Content-Range": f"bytes {chunk_start}-{chunk_end}/{transfer.total_size}",
+                    }
+
+                    for attempt in range(self.max_retries + 1):
+                        if check_stop():
+                            break
+                        try:
+                            async with session.post(
+                                url, data=chunk, headers=headers,
+                                timeout=chunk_timeout(chunk_end),
+                            ) as response:
+                                if response.status == 200:
+                                    transfer.retry_count = 0
+                                    retry_delay = INITIAL_RETRY_DELAY
+                                    if transfer.status == TransferStatus.RETRYING:
+                                        transfer.status = TransferStatus.TRANSFERRING
+
+                                    transfer.sent_bytes += len(chunk)
+
+                                    # Calculate speed
+                                    current_time = loop.time()
+                                    time_diff = current_time - last_progress_time
+                                    if time_diff > 0.5:  # Update speed every 0.5 seconds
+                                        bytes_diff = transfer.sent_bytes - last_sent_bytes
+                                        transfer.speed = bytes_diff / time_diff
+                                        last_progress_time = current_time
+                                        last_sent_bytes = transfer.sent_bytes
+
+                                    # Rate-limit UI notifications, but always report the last chunk
+                                    since_callback = current_time - last_callback_time
+                                    if self.on_transfer_progress and (
+                                        since_callback >= PROGRESS_CALLBACK_INTERVAL
+                                        or transfer.sent_bytes >= transfer.total_size
+                                    ):
+                                        last_callback_time = current_time
+                                        self.on_transfer_progress(transfer)
+
+                                    break
+                                else:
+                                    error_msg = f"Server error: {response.status}"
+                                    try:
+                                        error_data = await response.json()
+                                        error_msg = error_data.get("error", error_msg)
+                                    except (ValueError, aiohttp.ContentTypeError):
+                                        pass
+                                    raise aiohttp.ClientError(error_msg)
+
+                        except (aiohttp.ClientError, TimeoutError) as e:
+                            if check_stop():
+                                break
+                            transfer.retry_count = attempt + 1
+                            transfer.status = TransferStatus.RETRYING
+
+                            if attempt == self.max_retries:
+                                stop()
+                                transfer.status = TransferStatus.FAILED
+                                transfer.error = f"Max retries exceeded: {e}"
+                                if self.on_transfer_failed:
+                                    self.on_transfer_failed(transfer, transfer.error)
                                 break
-                            else:
-                                error_data = await response.json()
-                                raise aiohttp.ClientError(
-                                    error_data.get("error", f"Server error: {response.status}")
-                                )
-
-                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                        transfer.retry_count = attempt + 1
-                        transfer.status = TransferStatus.RETRYING
-
-                        if attempt == self.max_retries:
-                            transfer.status = TransferStatus.FAILED
-                            transfer.error = f"Max retries exceeded: {e}"
-                            if self.on_transfer_failed:
-                                self.on_transfer_failed(transfer, transfer.error)
-                            return
-
-                        # Exponential backoff
-                        await asyncio.sleep(retry_delay)
-                        retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
 
-                        # Re-seek to retry same chunk
-                        await f.seek(chunk_start)
-                        chunk = await f.read(self.chunk_size)
+                            # Jittered backoff so the upload workers don't retry in lockstep;
+                            # the chunk is still in memory for the retry. A cancel ends the wait
+                            retry_delay = next_retry_delay(retry_delay)
+                            try:
+                                await asyncio.wait_for(cancel_event.wait(), timeout=retry_delay)
+                            except TimeoutError:
+                                pass
+                except Exception as e:
+                    # Anything else (e.g. a failing progress callback) fails the transfer
+                    if not stopped:
+                        stop()
+                        transfer.status = TransferStatus.FAILED
+                        transfer.error = str(e)
+                        if self.on_transfer_failed:
+                            self.on_transfer_failed(transfer, transfer.error)
+                finally:
+                    # Response received, so the transport is done with the buffer
+                    free_buffers.put(buf)
+
+        workers = [
+            asyncio.create_task(upload_worker()) for _ in range(transfer.in_flight_chunks)
+        ]
+        cancel_watcher = asyncio.create_task(watch_cancel())
+        try:
+            # Hash while uploading unless the caller already knows the hash; a resumed
+            # upload first catches up on the bytes the receiver already has
+            hasher = None
+            if self.verify and not transfer.file_hash:
+                hasher = await asyncio.to_thread(
+                    _hash_prefix, transfer.file_path, transfer.sent_bytes
+                )
+
+            reader = threading.Thread(
+                target=read_ahead, args=(hasher,), name="lantransfer-reader", daemon=True
+            )
+            reader.start()
+            await read_done
 
-                if not success:
-                    return
+            for _ in workers:
+                window.put_nowait(None)
+            # Workers stopped by another one end cancelled
+            await asyncio.gather(*workers, return_exceptions=True)
 
-                transfer.status = TransferStatus.TRANSFERRING
+            if hasher and not stopped:
+                transfer.file_hash = hasher.hexdigest()
+        finally:
+            stopped = True
+            free_buffers.put(None)  # unblock a reader still waiting for a buffer
+            cancel_watcher.cancel()
+            for worker in workers:
+                worker.cancel()
 
     async def _complete_transfer(
         self,
@@ -435,12 +724,13 @@ class TransferClient:
         transfer: OutgoingTransfer,
     ) -> None:
         """Finalize the transfer and verify hash."""
-        transfer.status = TransferStatus.VERIFYING
+        if self.verify:
+            transfer.status = TransferStatus.VERIFYING
         url = f"{transfer.peer_url}/transfer/complete"
 
         try:
             async with session.post(
-                url, json={"transfer_id": transfer.transfer_id}
+                url, json={"transfer_id": transfer.transfer_id, "hash": transfer.file_hash}
             ) as response:
                 result = await response.json()
 
@@ -12,7 +12,7 @@ from zeroconf.asyncio import AsyncServiceInfo, AsyncZeroconf
 from lantransfer.utils import DEFAULT_PORT, SERVICE_TYPE, get_device_name, get_local_ip
 
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Peer:
     """Represents a discovered peer on the network."""
 
@@ -20,6 +20,11 @@ class Peer:
     address: str
     port: int
     device_id: str = ""
+    # Peers are identified by endpoint only; hashed once since they key UI lookups
+    _hash: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash", hash((self.address, self.port)))
 
     @property
     def url(self) -> str:
@@ -27,7 +32,7 @@ class Peer:
         return f"http://{self.address}:{self.port}"
 
     def __hash__(self) -> int:
-        return hash((self.address, self.port))
+        return self._hash
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Peer):
@@ -50,6 +55,8 @@ class DiscoveryService:
     _peers: dict[str, Peer] = field(default_factory=dict, init=False, repr=False)
     _running: bool = field(default=False, init=False, repr=False)
     _local_ip: str = field(default="", init=False, repr=False)
+    # (packed IPv4, port) of our own service, to recognise it in browse results
+    _self_key: tuple[bytes, int] = field(default=(b"", 0), init=False, repr=False)
     _loop: asyncio.AbstractEventLoop | None = field(default=None, init=False, repr=False)
 
     @property
@@ -63,6 +70,7 @@ class DiscoveryService:
             return
 
         self._local_ip = get_local_ip()
+        self._self_key = (socket.inet_aton(self._local_ip), self.port)
         self._loop = asyncio.get_running_loop()
         self._zeroconf = AsyncZeroconf(ip_version=IPVersion.V4Only)
 
@@ -110,7 +118,7 @@ class DiscoveryService:
             addresses=[socket.inet_aton(self._local_ip)],
             port=self.port,
             properties={
-                "version": "1.0",
+                "version": "1.1",
                 "device": self.device_name,
             },
             server=f"{self.device_name}.local.",
@@ -130,29 +138,32 @@ class DiscoveryService:
 
     def _add_peer(self, name: str, info: ServiceInfo) -> None:
         """Add a discovered peer."""
-        # Get the first IPv4 address
-        addresses = info.parsed_addresses(IPVersion.V4Only)
+        if name in self._peers:
+            return
+
+        # Get the first IPv4 address, still packed
+        addresses = info.addresses
         if not addresses:
             return
 
-        address = addresses[0]
+        packed = addresses[0]
 
         # Skip ourselves
-        if address == self._local_ip and info.port == self.port:
+        if (packed, info.port) == self._self_key:
             return
 
+        device = info.properties.get(b"device")
         peer = Peer(
-            name=info.properties.get(b"device", name.encode()).decode(),
-            address=address,
+            name=device.decode() if device else name,
+            address=socket.inet_ntoa(packed),
             port=info.port,
             device_id=name,
         )
 
-        if name not in self._peers:
-            self._peers[name] = peer
-            if self.on_peer_added and self._loop:
-                # Thread-safe callback to main event loop
-                self._loop.call_soon_threadsafe(self.on_peer_added, peer)
+        self._peers[name] = peer
+        if self.on_peer_added and self._loop:
+            # Thread-safe callback to main event loop
+            self._loop.call_soon_threadsafe(self.on_peer_added, peer)
 
     def _remove_peer(self, name: str) -> None:
         """Remove a peer that went offline."""
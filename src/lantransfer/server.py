@@ -1,24 +1,137 @@
 """HTTP server for receiving file transfers."""
 
 import asyncio
+import ctypes
+import errno
+import functools
 import hashlib
 import json
+import os
+import re
+import shutil
+import subprocess
+import sys
 import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Callable
 
-import aiofiles
 from aiohttp import web
 
 from lantransfer.utils import (
-    CHUNK_SIZE,
+    CONNECTION_TIMEOUT,
     DEFAULT_PORT,
+    MAX_CHUNK_BYTES,
+    MIN_TRANSFER_RATE,
+    PROGRESS_CALLBACK_INTERVAL,
     format_size,
     generate_transfer_id,
     get_downloads_dir,
+    json_dumps,
+    json_loads,
+    new_sha256,
 )
 
+# JSON responses go through orjson when it is installed
+_json_response = functools.partial(web.json_response, dumps=json_dumps)
+
+# Start offset from a "Content-Range: bytes X-Y/Total" header
+_RANGE_RE = re.compile(r"bytes (\d+)-")
+
+# Bytes of a chunk body gathered before each write+hash thread hop
+STREAM_WRITE_SIZE = 1024 * 1024
+
+# tarfile only reads zstd from Python 3.14, so .tar.zst archives go through the zstd binary
+ZSTD_BIN = shutil.which("zstd")
+
+
+if hasattr(os, "pwrite"):
+    _pwrite = os.pwrite
+else:
+    def _pwrite(fd: int, data: memoryview, offset: int) -> int:
+        # Windows has no pwrite; only one writer per transfer runs at a time
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
+
+
+def _load_fallocate() -> Callable[[int, int, int, int], int] | None:
+    """Linux fallocate(2) from libc, or None where it isn't available."""
+    # Not os.posix_fallocate: on filesystems without native support (FAT, exFAT,
+    # some NFS) glibc emulates it by writing every block, which for a large file
+    # would stall /transfer/init for minutes; fallocate(2) fails with EOPNOTSUPP
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return None
+    fallocate = getattr(libc, "fallocate64", None) or getattr(libc, "fallocate", None)
+    if fallocate is None:
+        return None
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+
+_fallocate = _load_fallocate()
+
+
+def _preallocate(fd: int, size: int) -> None:
+    """Reserve the temp file's full size up front, for contiguous extents."""
+    if _fallocate is None or size <= 0:
+        return
+    if _fallocate(fd, 0, 0, size) != 0:
+        # Filesystems without fallocate support are fine; a full disk should fail now
+        err = ctypes.get_errno()
+        if err == errno.ENOSPC:
+            raise OSError(err, os.strerror(err))
+
+
+def _write_and_hash(fd: int, chunk: bytes, offset: int, hasher: "hashlib._Hash | None") -> None:
+    """Write a piece of a chunk at offset and fold it into the running hash."""
+    view = memoryview(chunk)
+    while view:
+        n = _pwrite(fd, view, offset)
+        view = view[n:]
+        offset += n
+    if hasher:
+        hasher.update(chunk)
+
+
+async def _receive_body(
+    request: web.Request,
+    transfer: "IncomingTransfer",
+    limit: int,
+    io_pool: ThreadPoolExecutor | None,
+) -> int:
+    """Stream a chunk body to the temp file in STREAM_WRITE_SIZE pieces; returns its length.
+
+    Writes are positional, so a body cut short leaves nothing for the retry to undo
+    beyond the hasher, which the caller restores.
+    """
+    loop = asyncio.get_running_loop()
+    hasher = transfer.hasher if transfer.verify else None
+    offset = transfer.received_bytes
+    received = 0
+    pending = bytearray()
+    async for data in request.content.iter_any():
+        transfer.last_activity = time.monotonic()
+        received += len(data)
+        if received > limit:
+            raise web.HTTPRequestEntityTooLarge(max_size=limit, actual_size=received)
+        pending += data
+        if len(pending) >= STREAM_WRITE_SIZE:
+            await loop.run_in_executor(
+                io_pool, _write_and_hash, transfer.fd, pending, offset, hasher
+            )
+            offset += len(pending)
+            pending.clear()
+    if pending:
+        await loop.run_in_executor(io_pool, _write_and_hash, transfer.fd, pending, offset, hasher)
+    return received
+
 
 @dataclass
 class IncomingTransfer:
@@ -31,9 +144,29 @@ class IncomingTransfer:
     received_bytes: int = 0
     temp_path: Path | None = None
     final_path: Path | None = None
-    hasher: hashlib.sha256 = field(default_factory=hashlib.sha256, repr=False)
+    hasher: "hashlib._Hash" = field(default_factory=new_sha256, repr=False)
     completed: bool = False
     error: str | None = None
+    verify: bool = True  # False when the sender opted out of hash verification
+    # Temp file descriptor kept open for the whole transfer instead of reopened per chunk
+    fd: int | None = field(default=None, repr=False)
+    last_progress_callback: float = field(default=0.0, repr=False)
+    # When body data last arrived; held chunks stop waiting once it goes stale
+    last_activity: float = field(default_factory=time.monotonic, repr=False)
+    # Notified whenever received_bytes advances; lets pipelined chunks wait their turn
+    advanced: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+    # Held while a chunk body streams to disk, so a retried duplicate can't interleave
+    write_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    _inv_total: float = field(default=0.0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Progress is reported on every chunk; multiply by a cached reciprocal
+        self._inv_total = 1.0 / self.total_size if self.total_size else 0.0
+
+    @property
+    def progress_fraction(self) -> float:
+        """Fraction of the file received so far (0.0 to 1.0)."""
+        return self.received_bytes * self._inv_total
 
 
 @dataclass
@@ -54,6 +187,10 @@ class TransferServer:
     _site: web.TCPSite | None = field(default=None, init=False, repr=False)
     _transfers: dict[str, IncomingTransfer] = field(default_factory=dict, init=False, repr=False)
     _running: bool = field(default=False, init=False, repr=False)
+    # Chunk writes and archive extraction get their own threads, so a long extraction
+    # can't hold up writes queued behind it on the loop's default executor
+    _io_pool: ThreadPoolExecutor | None = field(default=None, init=False, repr=False)
+    _extract_pool: ThreadPoolExecutor | None = field(default=None, init=False, repr=False)
 
     @property
     def is_running(self) -> bool:
@@ -67,12 +204,20 @@ class TransferServer:
         # Ensure download directory exists
         self.download_dir.mkdir(parents=True, exist_ok=True)
 
-        # Create aiohttp app
-        self._app = web.Application(client_max_size=CHUNK_SIZE * 2)
+        # Create aiohttp app; chunk bodies are streamed and capped at MAX_CHUNK_BYTES in
+        # _receive_body, so the default body limit only applies to the JSON endpoints
+        self._app = web.Application()
         self._setup_routes()
 
-        # Start server
-        self._runner = web.AppRunner(self._app)
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lantransfer-io")
+        self._extract_pool = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="lantransfer-extract"
+        )
+
+        # Start server. read_bufsize raises the request body buffer's high-water mark from
+        # 64 KiB, so a fast sender isn't paused and resumed every few packets; aiohttp
+        # already sets TCP_NODELAY and SO_KEEPALIVE on accepted connections
+        self._runner = web.AppRunner(self._app, read_bufsize=STREAM_WRITE_SIZE)
         await self._runner.setup()
         self._site = web.TCPSite(self._runner, "0.0.0.0", self.port)
         await self._site.start()
@@ -86,6 +231,7 @@ class TransferServer:
 
         # Clean up incomplete transfers
         for transfer in self._transfers.values():
+            self._close_file(transfer)
             if transfer.temp_path and transfer.temp_path.exists():
                 try:
                     transfer.temp_path.unlink()
@@ -100,6 +246,12 @@ class TransferServer:
             await self._runner.cleanup()
             self._runner = None
 
+        for pool in (self._io_pool, self._extract_pool):
+            if pool:
+                pool.shutdown(wait=False)
+        self._io_pool = None
+        self._extract_pool = None
+
         self._app = None
         self._transfers.clear()
         self._running = False
@@ -118,7 +270,7 @@ class TransferServer:
 
     async def _handle_status(self, request: web.Request) -> web.Response:
         """Health check endpoint."""
-        return web.json_response({
+        return _json_response({
             "status": "ok",
             "active_transfers": len(self._transfers),
         })
@@ -126,18 +278,19 @@ class TransferServer:
     async def _handle_init(self, request: web.Request) -> web.Response:
         """Initialize a new transfer or resume an existing one."""
         try:
-            data = await request.json()
+            data = await request.json(loads=json_loads)
         except json.JSONDecodeError:
-            return web.json_response({"error": "Invalid JSON"}, status=400)
+            return _json_response({"error": "Invalid JSON"}, status=400)
 
         try:
             filename = data.get("filename")
             total_size = data.get("size")
             expected_hash = data.get("hash", "")
             resume_id = data.get("resume_id")
+            verify = bool(data.get("verify", True))
 
             if not filename or not total_size:
-                return web.json_response(
+                return _json_response(
                     {"error": "Missing required fields: filename, size"},
                     status=400,
                 )
@@ -146,9 +299,10 @@ class TransferServer:
             if resume_id and resume_id in self._transfers:
                 existing = self._transfers[resume_id]
                 if existing.filename == filename and existing.total_size == total_size:
-                    return web.json_response({
+                    return _json_response({
                         "transfer_id": resume_id,
                         "resume_offset": existing.received_bytes,
+                        "max_chunk_size": MAX_CHUNK_BYTES,
                         "status": "resuming",
                     })
 
@@ -162,13 +316,15 @@ class TransferServer:
             temp_path = self.download_dir / f".{transfer_id}_{safe_filename}.part"
             final_path = self.download_dir / safe_filename
 
-            # Handle filename conflicts
-            counter = 1
-            while final_path.exists():
-                stem = Path(safe_filename).stem
-                suffix = Path(safe_filename).suffix
+            # Handle filename conflicts; one stat in the common case, and a single
+            # directory listing instead of a stat per candidate name otherwise
+            if final_path.exists():
+                stem, suffix = final_path.stem, final_path.suffix
+                existing = {entry.name for entry in os.scandir(self.download_dir)}
+                counter = 1
+                while f"{stem}_{counter}{suffix}" in existing:
+                    counter += 1
                 final_path = self.download_dir / f"{stem}_{counter}{suffix}"
-                counter += 1
 
             transfer = IncomingTransfer(
                 transfer_id=transfer_id,
@@ -177,107 +333,157 @@ class TransferServer:
                 expected_hash=expected_hash,
                 temp_path=temp_path,
                 final_path=final_path,
+                verify=verify,
             )
 
-            self._transfers[transfer_id] = transfer
+            # Create the temp file; chunks are written at their offsets through this descriptor
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+            transfer.fd = os.open(temp_path, flags, 0o644)
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._io_pool, _preallocate, transfer.fd, total_size
+                )
+            except OSError:
+                self._close_file(transfer)
+                temp_path.unlink(missing_ok=True)
+                raise
 
-            # Create empty temp file
-            async with aiofiles.open(temp_path, "wb") as f:
-                pass
+            self._transfers[transfer_id] = transfer
 
             if self.on_transfer_started:
                 self.on_transfer_started(transfer)
 
-            return web.json_response({
+            return _json_response({
                 "transfer_id": transfer_id,
                 "resume_offset": 0,
+                "max_chunk_size": MAX_CHUNK_BYTES,
                 "status": "ready",
             })
 
         except Exception as e:
-            return web.json_response({"error": f"Server error: {str(e)}"}, status=500)
+            return _json_response({"error": f"Server error: {str(e)}"}, status=500)
 
     async def _handle_chunk(self, request: web.Request) -> web.Response:
         """Receive a file chunk."""
         transfer_id = request.headers.get("X-Transfer-ID")
         if not transfer_id or transfer_id not in self._transfers:
-            return web.json_response({"error": "Invalid transfer ID"}, status=400)
+            return _json_response({"error": "Invalid transfer ID"}, status=400)
 
         transfer = self._transfers[transfer_id]
 
-        # Parse range header
-        range_header = request.headers.get("Content-Range", "")
-        start_byte = 0
-        if range_header.startswith("bytes "):
-            try:
-                range_part = range_header.split(" ")[1].split("/")[0]
-                start_byte = int(range_part.split("-")[0])
-            except (ValueError, IndexError):
-                pass
-
-        # Validate start position matches our progress
-        if start_byte != transfer.received_bytes:
-            return web.json_response({
-                "error": "Invalid chunk position",
-                "expected": transfer.received_bytes,
-                "received": start_byte,
-            }, status=400)
-
-        if not transfer.temp_path:
-            return web.json_response({"error": "Transfer not initialized"}, status=400)
+        # Parse range header; pipelined chunks need their start offset to wait their turn
+        match = _RANGE_RE.match(request.headers.get("Content-Range", ""))
+        start_byte = int(match.group(1)) if match else 0
+
+        # Senders pipeline several chunks; hold this one until its predecessors are
+        # written. Give up once no body data has arrived for CONNECTION_TIMEOUT (a
+        # stalled sender), and in any case after the predecessors' bytes would take
+        # at MIN_TRANSFER_RATE; the sender's own timeout for this chunk is longer
+        if start_byte > transfer.received_bytes:
+            deadline = (
+                time.monotonic()
+                + CONNECTION_TIMEOUT
+                + (start_byte - transfer.received_bytes) / MIN_TRANSFER_RATE
+            )
+            async with transfer.advanced:
+                while transfer.received_bytes < start_byte:
+                    now = time.monotonic()
+                    left = min(deadline, transfer.last_activity + CONNECTION_TIMEOUT) - now
+                    if left <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(transfer.advanced.wait(), timeout=left)
+                    except TimeoutError:
+                        pass
+
+        if transfer.fd is None:
+            return _json_response({"error": "Transfer not initialized"}, status=400)
 
         try:
-            # Read and write chunk
-            chunk = await request.read()
-            
-            async with aiofiles.open(transfer.temp_path, "ab") as f:
-                await f.write(chunk)
+            async with transfer.write_lock:
+                # Validate start position matches our progress
+                if start_byte != transfer.received_bytes:
+                    return _json_response({
+                        "error": "Invalid chunk position",
+                        "expected": transfer.received_bytes,
+                        "received": start_byte,
+                    }, status=400)
+
+                # Stream the body to disk as it arrives rather than buffering the whole
+                # chunk; if it is cut short, the hash rolls back for the sender's retry
+                limit = min(MAX_CHUNK_BYTES, transfer.total_size - start_byte)
+                checkpoint = transfer.hasher.copy() if transfer.verify else None
+                try:
+                    received = await _receive_body(request, transfer, limit, self._io_pool)
+                except BaseException:
+                    if checkpoint:
+                        transfer.hasher = checkpoint
+                    raise
 
-            # Update progress
-            transfer.received_bytes += len(chunk)
-            transfer.hasher.update(chunk)
+                # Update progress
+                transfer.received_bytes += received
 
-            if self.on_transfer_progress:
-                self.on_transfer_progress(transfer)
+            async with transfer.advanced:
+                transfer.advanced.notify_all()
 
-            return web.json_response({
+            # Throttle progress callbacks, but always report the final chunk
+            if self.on_transfer_progress:
+                now = time.monotonic()
+                if (
+                    transfer.received_bytes >= transfer.total_size
+                    or now - transfer.last_progress_callback >= PROGRESS_CALLBACK_INTERVAL
+                ):
+                    transfer.last_progress_callback = now
+                    self.on_transfer_progress(transfer)
+
+            return _json_response({
                 "status": "ok",
                 "received": transfer.received_bytes,
                 "total": transfer.total_size,
-                "progress": transfer.received_bytes / transfer.total_size,
+                "progress": transfer.progress_fraction,
             })
 
+        except web.HTTPRequestEntityTooLarge:
+            return _json_response({"error": "Chunk too large"}, status=413)
+
         except Exception as e:
             error_msg = str(e)
             transfer.error = error_msg
             if self.on_transfer_failed:
                 self.on_transfer_failed(transfer, error_msg)
-            return web.json_response({"error": error_msg}, status=500)
+            return _json_response({"error": error_msg}, status=500)
 
     async def _handle_complete(self, request: web.Request) -> web.Response:
         """Finalize a transfer and verify hash."""
         try:
-            data = await request.json()
+            data = await request.json(loads=json_loads)
         except json.JSONDecodeError:
-            return web.json_response({"error": "Invalid JSON"}, status=400)
+            return _json_response({"error": "Invalid JSON"}, status=400)
 
         transfer_id = data.get("transfer_id")
         if not transfer_id or transfer_id not in self._transfers:
-            return web.json_response({"error": "Invalid transfer ID"}, status=400)
+            return _json_response({"error": "Invalid transfer ID"}, status=400)
 
         transfer = self._transfers[transfer_id]
 
+        # Senders that hash while uploading only know the hash at this point
+        if data.get("hash"):
+            transfer.expected_hash = data["hash"]
+
         # Verify we received all bytes
         if transfer.received_bytes != transfer.total_size:
-            return web.json_response({
+            return _json_response({
                 "error": "Incomplete transfer",
                 "received": transfer.received_bytes,
                 "expected": transfer.total_size,
             }, status=400)
 
+        # Release the temp file before verifying and moving it
+        self._close_file(transfer)
+
         # Verify hash
-        computed_hash = transfer.hasher.hexdigest()
-        if transfer.expected_hash and computed_hash != transfer.expected_hash:
+        computed_hash = transfer.hasher.hexdigest() if transfer.verify else ""
+        if transfer.verify and transfer.expected_hash and computed_hash != transfer.expected_hash:
             error_msg = "Hash mismatch - file may be corrupted"
             transfer.error = error_msg
             if self.on_transfer_failed:
@@ -287,26 +493,25 @@ class TransferServer:
             if transfer.temp_path and transfer.temp_path.exists():
                 transfer.temp_path.unlink()
             
-            return web.json_response({
+            return _json_response({
                 "error": error_msg,
                 "expected_hash": transfer.expected_hash,
                 "computed_hash": computed_hash,
             }, status=400)
 
-        # Move temp file to final location
+        # Move temp file to final location, off the event loop
         if transfer.temp_path and transfer.final_path:
             try:
-                transfer.temp_path.rename(transfer.final_path)
+                await asyncio.to_thread(os.replace, transfer.temp_path, transfer.final_path)
             except OSError:
-                # Cross-device move, copy instead
-                import shutil
-                shutil.move(str(transfer.temp_path), str(transfer.final_path))
+                # Cross-device move; shutil copies with os.sendfile where available
+                await asyncio.to_thread(shutil.move, transfer.temp_path, transfer.final_path)
 
-        # Auto-extract tar/tar.gz files (folder transfers)
+        # Auto-extract tar/tar.gz/tar.zst files (folder transfers)
         extracted_path = None
         is_tarball = transfer.final_path and (
             transfer.final_path.suffix == ".tar" or
-            (transfer.final_path.suffix == ".gz" and ".tar" in transfer.final_path.name)
+            (transfer.final_path.suffix in (".gz", ".zst") and ".tar" in transfer.final_path.name)
         )
         if is_tarball:
             try:
@@ -331,11 +536,11 @@ class TransferServer:
         # Clean up transfer record
         del self._transfers[transfer_id]
 
-        return web.json_response({
+        return _json_response({
             "status": "completed",
             "path": str(extracted_path or transfer.final_path),
             "size": format_size(transfer.total_size),
-            "hash_verified": bool(transfer.expected_hash),
+            "hash_verified": transfer.verify and bool(transfer.expected_hash),
             "extracted": extracted_path is not None,
         })
 
@@ -344,16 +549,16 @@ class TransferServer:
         transfer_id = request.match_info["transfer_id"]
 
         if transfer_id not in self._transfers:
-            return web.json_response({"error": "Transfer not found"}, status=404)
+            return _json_response({"error": "Transfer not found"}, status=404)
 
         transfer = self._transfers[transfer_id]
 
-        return web.json_response({
+        return _json_response({
             "transfer_id": transfer_id,
             "filename": transfer.filename,
             "received_bytes": transfer.received_bytes,
             "total_size": transfer.total_size,
-            "progress": transfer.received_bytes / transfer.total_size if transfer.total_size else 0,
+            "progress": transfer.progress_fraction,
             "completed": transfer.completed,
             "error": transfer.error,
         })
@@ -363,9 +568,10 @@ class TransferServer:
         transfer_id = request.match_info["transfer_id"]
 
         if transfer_id not in self._transfers:
-            return web.json_response({"error": "Transfer not found"}, status=404)
+            return _json_response({"error": "Transfer not found"}, status=404)
 
         transfer = self._transfers[transfer_id]
+        self._close_file(transfer)
 
         # Clean up temp file
         if transfer.temp_path and transfer.temp_path.exists():
@@ -376,40 +582,79 @@ class TransferServer:
 
         del self._transfers[transfer_id]
 
-        return web.json_response({"status": "cancelled"})
+        return _json_response({"status": "cancelled"})
+
+    def _close_file(self, transfer: IncomingTransfer) -> None:
+        """Close the transfer's temp file descriptor if it is still open."""
+        if transfer.fd is not None:
+            fd, transfer.fd = transfer.fd, None
+            try:
+                os.close(fd)
+            except OSError:
+                pass
 
     async def _extract_tarball(self, tarball_path: Path) -> Path:
         """Extract a tarball and return the path to the extracted folder."""
         extract_dir = tarball_path.parent
         
-        # Determine the open mode based on file extension
+        # Determine the open mode based on file extension; streaming modes read the
+        # archive front to back exactly once
         if tarball_path.suffix == ".gz":
-            mode = "r:gz"
+            mode = "r|gz"
+        elif tarball_path.suffix == ".zst":
+            mode = "r|zst"
         else:
-            mode = "r:"
+            mode = "r|"
 
         # Extract in thread pool to avoid blocking
         loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
+        extracted_name = await loop.run_in_executor(
+            self._extract_pool,
             self._do_extract,
             tarball_path,
             extract_dir,
             mode,
         )
 
-        # Find the extracted folder name (first entry in the tarball)
-        with tarfile.open(tarball_path, mode) as tar:
-            first_member = tar.getmembers()[0]
-            extracted_name = first_member.name.split("/")[0]
-
         # Remove the tarball after extraction
         tarball_path.unlink()
 
         return extract_dir / extracted_name
 
-    def _do_extract(self, tarball_path: Path, extract_dir: Path, mode: str) -> None:
-        """Extract tarball synchronously."""
-        with tarfile.open(tarball_path, mode) as tar:
-            tar.extractall(path=extract_dir)
-
+    def _do_extract(self, tarball_path: Path, extract_dir: Path, mode: str) -> str:
+        """Extract tarball synchronously and return its top-level entry name."""
+        if mode == "r|zst":
+            if not ZSTD_BIN:
+                raise RuntimeError("zstd is not installed")
+            with subprocess.Popen(
+                [ZSTD_BIN, "-dcq", str(tarball_path)],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            ) as proc:
+                first_name = self._extract_stream(proc.stdout, extract_dir, "r|", tarball_path.name)
+                proc.stdout.read()  # Drain the trailing padding so zstd exits cleanly
+            if proc.returncode != 0:
+                raise RuntimeError(f"zstd failed with exit code {proc.returncode}")
+            return first_name
+
+        with open(tarball_path, "rb") as f:
+            return self._extract_stream(f, extract_dir, mode, tarball_path.name)
+
+    def _extract_stream(self, fileobj, extract_dir: Path, mode: str, name: str) -> str:
+        """Extract a tar stream in one pass and return its top-level entry name."""
+        first_name = None
+
+        with tarfile.open(fileobj=fileobj, mode=mode, bufsize=1 << 20) as tar:
+            def members():
+                # Note the first entry's name on the way through, instead of a second pass
+                nonlocal first_name
+                for member in tar:
+                    if first_name is None:
+                        first_name = member.name.split("/")[0]
+                    yield member
+
+            tar.extractall(path=extract_dir, members=members())
+
+        if first_name is None:
+            raise ValueError(f"Empty archive: {name}")
+        return first_name
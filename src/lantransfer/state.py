@@ -1,16 +1,22 @@
 """Transfer state persistence for resumable transfers."""
 
+import atexit
+import heapq
 import json
+import os
 import time
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from lantransfer.utils import get_data_dir
+from lantransfer.utils import get_data_dir, json_dumps, json_loads
 
 
-STATE_FILE = "transfers.json"
+STATE_FILE = "transfers.jsonl"  # Append-only log, one state record per line
+LEGACY_STATE_FILE = "transfers.json"  # Single JSON document used before the log; migrated on load
 STATE_CLEANUP_AGE = 86400  # 24 hours in seconds
+COMPACT_RATIO = 10  # Rewrite the log once it holds this many lines per live transfer
+SAVE_INTERVAL = 1.0  # Minimum seconds between progress writes
 
 
 @dataclass
@@ -31,7 +37,20 @@ class TransferState:
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        # Built by hand: asdict() deep-copies every field, which a flat record doesn't need
+        return {
+            "transfer_id": self.transfer_id,
+            "file_path": self.file_path,
+            "filename": self.filename,
+            "peer_url": self.peer_url,
+            "peer_name": self.peer_name,
+            "total_size": self.total_size,
+            "sent_bytes": self.sent_bytes,
+            "file_hash": self.file_hash,
+            "direction": self.direction,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "TransferState":
@@ -66,55 +85,154 @@ class StateManager:
         self._data_dir = data_dir or get_data_dir()
         self._state_file = self._data_dir / STATE_FILE
         self._states: dict[str, TransferState] = {}
+        # Secondary indices over _states, kept in sync by _add_state/_drop_state
+        self._by_direction: dict[str, set[str]] = {"outgoing": set(), "incoming": set()}
+        self._outgoing_by_key: dict[tuple[str, str], str] = {}  # (file_path, peer_url) -> id
+        # (updated_at, id) min-heap; entries may be stale and are checked when popped
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._log_lines = 0  # Records in the log file, live or superseded
+        self._dirty: set[str] = set()  # Transfers with progress not yet written
+        self._last_flush = 0.0
         self._load()
+        # Write throttled progress on exit even if close() is never called
+        atexit.register(self.flush)
+
+    def close(self) -> None:
+        """Write pending progress; call on shutdown."""
+        self.flush()
+        atexit.unregister(self.flush)
 
     def _load(self) -> None:
-        """Load state from disk."""
+        """Load state from disk by replaying the log; the last record per transfer wins."""
         if not self._state_file.exists():
+            self._migrate_legacy()
             return
 
         try:
-            with open(self._state_file, "r") as f:
-                data = json.load(f)
-
-            for item in data.get("transfers", []):
-                try:
-                    state = TransferState.from_dict(item)
-                    if not state.is_expired:
-                        self._states[state.transfer_id] = state
-                except (KeyError, TypeError):
-                    continue
-
-        except (json.JSONDecodeError, IOError):
-            # Corrupted file, start fresh
-            self._states = {}
-
-    def _save(self) -> None:
-        """Save state to disk."""
-        self._data_dir.mkdir(parents=True, exist_ok=True)
-
-        # Clean up expired states before saving
+            with open(self._state_file) as f:
+                for line in f:
+                    self._log_lines += 1
+                    try:
+                        item = json_loads(line)
+                        if item.get("removed"):
+                            self._drop_state(item["transfer_id"])
+                        else:
+                            self._add_state(TransferState.from_dict(item))
+                    except (json.JSONDecodeError, AttributeError, KeyError, TypeError):
+                        # Torn or corrupted line (e.g. a crash mid-write), skip it
+                        continue
+
+        except OSError:
+            # Unreadable file, start fresh
+            for transfer_id in list(self._states):
+                self._drop_state(transfer_id)
+
         self._cleanup_expired()
 
-        data = {
-            "version": 1,
-            "transfers": [state.to_dict() for state in self._states.values()],
-        }
+    def _migrate_legacy(self) -> None:
+        """Carry states over from the old transfers.json into the log, once."""
+        legacy_file = self._data_dir / LEGACY_STATE_FILE
+        try:
+            with open(legacy_file) as f:
+                data = json_loads(f.read())
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, OSError, ValueError):
+            data = {}
+
+        for item in data.get("transfers", []) if isinstance(data, dict) else []:
+            try:
+                self._add_state(TransferState.from_dict(item))
+            except (KeyError, TypeError):
+                continue
+
+        self._compact()
+        # Only drop the old file once the log holds its states
+        if self._state_file.exists():
+            try:
+                legacy_file.unlink()
+            except OSError:
+                pass
+
+    def _add_state(self, state: TransferState) -> None:
+        """Add or replace a state and index it."""
+        self._drop_state(state.transfer_id)
+        self._states[state.transfer_id] = state
+        self._by_direction.setdefault(state.direction, set()).add(state.transfer_id)
+        if state.direction == "outgoing":
+            self._outgoing_by_key[(state.file_path, state.peer_url)] = state.transfer_id
+        heapq.heappush(self._expiry_heap, (state.updated_at, state.transfer_id))
+
+    def _drop_state(self, transfer_id: str) -> TransferState | None:
+        """Remove a state and its index entries; its heap entry goes stale."""
+        state = self._states.pop(transfer_id, None)
+        if state:
+            self._by_direction.get(state.direction, set()).discard(transfer_id)
+            key = (state.file_path, state.peer_url)
+            if self._outgoing_by_key.get(key) == transfer_id:
+                del self._outgoing_by_key[key]
+        self._dirty.discard(transfer_id)
+        return state
+
+    def _append(self, record: dict[str, Any]) -> None:
+        """Append a single state record to the log, compacting it when it grows too long."""
+        if self._log_lines >= COMPACT_RATIO * max(len(self._states), 1):
+            self._compact()
+            return
 
         try:
-            with open(self._state_file, "w") as f:
-                json.dump(data, f, indent=2)
-        except IOError:
+            self._data_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._state_file, "a") as f:
+                f.write(json_dumps(record) + "\n")
+            self._log_lines += 1
+        except OSError:
             pass
 
+    def _compact(self) -> None:
+        """Rewrite the log with only the live, unexpired states."""
+        self._cleanup_expired()
+
+        temp_file = self._state_file.with_suffix(".tmp")
+        try:
+            self._data_dir.mkdir(parents=True, exist_ok=True)
+            with open(temp_file, "w") as f:
+                for state in self._states.values():
+                    f.write(json_dumps(state.to_dict()) + "\n")
+            # Atomic swap, so a crash leaves either the old or the new log
+            os.replace(temp_file, self._state_file)
+            self._log_lines = len(self._states)
+        except OSError:
+            pass
+
+    def _save_progress(self, transfer_id: str) -> None:
+        """Record a progress update, writing at most once per SAVE_INTERVAL."""
+        self._dirty.add(transfer_id)
+        if time.monotonic() - self._last_flush >= SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write any progress updates held back by the save throttle."""
+        for transfer_id in self._dirty:
+            state = self._states.get(transfer_id)
+            if state:
+                self._append(state.to_dict())
+        self._dirty.clear()
+        self._last_flush = time.monotonic()
+
     def _cleanup_expired(self) -> None:
-        """Remove expired transfer states."""
-        expired = [
-            tid for tid, state in self._states.items()
-            if state.is_expired
-        ]
-        for tid in expired:
-            del self._states[tid]
+        """Remove expired transfer states, oldest first, stopping at the first live one."""
+        cutoff = time.time() - STATE_CLEANUP_AGE
+        heap = self._expiry_heap
+        while heap and heap[0][0] < cutoff:
+            _, tid = heapq.heappop(heap)
+            state = self._states.get(tid)
+            if state is None:
+                continue  # Already removed
+            if state.is_expired:
+                self._drop_state(tid)
+            else:
+                # Updated since this entry was pushed; requeue at its current time
+                heapq.heappush(heap, (state.updated_at, tid))
 
     def save_outgoing_transfer(
         self,
@@ -133,6 +251,7 @@ class StateManager:
             state = self._states[transfer_id]
             state.sent_bytes = sent_bytes
             state.updated_at = now
+            self._save_progress(transfer_id)
         else:
             state = TransferState(
                 transfer_id=transfer_id,
@@ -147,9 +266,8 @@ class StateManager:
                 created_at=now,
                 updated_at=now,
             )
-            self._states[transfer_id] = state
-
-        self._save()
+            self._add_state(state)
+            self._append(state.to_dict())
 
     def save_incoming_transfer(
         self,
@@ -166,6 +284,7 @@ class StateManager:
             state = self._states[transfer_id]
             state.sent_bytes = received_bytes
             state.updated_at = now
+            self._save_progress(transfer_id)
         else:
             state = TransferState(
                 transfer_id=transfer_id,
@@ -180,9 +299,8 @@ class StateManager:
                 created_at=now,
                 updated_at=now,
             )
-            self._states[transfer_id] = state
-
-        self._save()
+            self._add_state(state)
+            self._append(state.to_dict())
 
     def get_transfer(self, transfer_id: str) -> TransferState | None:
         """Get a transfer state by ID."""
@@ -197,22 +315,14 @@ class StateManager:
 
     def get_outgoing_by_file(self, file_path: Path, peer_url: str) -> TransferState | None:
         """Find an existing outgoing transfer for a file and peer."""
-        file_path_str = str(file_path)
-        for state in self._states.values():
-            if (
-                state.direction == "outgoing"
-                and state.file_path == file_path_str
-                and state.peer_url == peer_url
-                and state.can_resume
-            ):
-                return state
-        return None
+        transfer_id = self._outgoing_by_key.get((str(file_path), peer_url))
+        state = self._states.get(transfer_id) if transfer_id else None
+        return state if state and state.can_resume else None
 
     def complete_transfer(self, transfer_id: str) -> None:
         """Mark a transfer as complete and remove from state."""
-        if transfer_id in self._states:
-            del self._states[transfer_id]
-            self._save()
+        if self._drop_state(transfer_id):
+            self._append({"transfer_id": transfer_id, "removed": True})
 
     def fail_transfer(self, transfer_id: str) -> None:
         """
@@ -221,19 +331,25 @@ class StateManager:
         The state will be automatically cleaned up after 24 hours.
         """
         if transfer_id in self._states:
-            self._states[transfer_id].updated_at = time.time()
-            self._save()
+            state = self._states[transfer_id]
+            state.updated_at = time.time()
+            self._dirty.discard(transfer_id)
+            self._append(state.to_dict())
 
     def remove_transfer(self, transfer_id: str) -> None:
         """Remove a transfer state entirely."""
-        if transfer_id in self._states:
-            del self._states[transfer_id]
-            self._save()
+        if self._drop_state(transfer_id):
+            self._append({"transfer_id": transfer_id, "removed": True})
 
     def clear_all(self) -> None:
         """Clear all transfer states."""
         self._states.clear()
-        self._save()
+        for ids in self._by_direction.values():
+            ids.clear()
+        self._outgoing_by_key.clear()
+        self._expiry_heap.clear()
+        self._dirty.clear()
+        self._compact()
 
     @property
     def pending_transfers(self) -> list[TransferState]:
@@ -246,18 +362,12 @@ class StateManager:
     @property
     def outgoing_transfers(self) -> list[TransferState]:
         """Get all outgoing transfer states."""
-        return [
-            state for state in self._states.values()
-            if state.direction == "outgoing"
-        ]
+        return [self._states[tid] for tid in self._by_direction["outgoing"]]
 
     @property
     def incoming_transfers(self) -> list[TransferState]:
         """Get all incoming transfer states."""
-        return [
-            state for state in self._states.values()
-            if state.direction == "incoming"
-        ]
+        return [self._states[tid] for tid in self._by_direction["incoming"]]
 
 
 
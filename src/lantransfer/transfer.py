@@ -1,16 +1,28 @@
 """Transfer manager for coordinating file transfers."""
 
 import asyncio
+import stat
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Callable
-from uuid import uuid4
 
 from lantransfer.client import OutgoingTransfer, TransferClient, TransferStatus
 from lantransfer.discovery import Peer
 from lantransfer.server import IncomingTransfer, TransferServer
-from lantransfer.utils import format_size, format_speed, format_time
+from lantransfer.utils import format_size, format_speed, format_time, generate_transfer_id
+
+# Queue change notifications are coalesced to at most one per interval (20 Hz)
+QUEUE_NOTIFY_INTERVAL = 0.05
+
+ACTIVE_STATUSES = frozenset(
+    ("connecting", "transferring", "retrying", "verifying", "tarring", "extracting")
+)
+FINISHED_STATUSES = frozenset(("completed", "failed", "cancelled"))
+
+# Progress smaller than 1 << PROGRESS_NOTIFY_SHIFT bytes (64 KiB) doesn't notify listeners
+PROGRESS_NOTIFY_SHIFT = 16
 
 
 class TransferDirection(Enum):
@@ -40,6 +52,8 @@ class QueuedTransfer:
     _outgoing: OutgoingTransfer | None = field(default=None, repr=False)
     _incoming: IncomingTransfer | None = field(default=None, repr=False)
     _file_path: Path | None = field(default=None, repr=False)
+    # Last progress_text, keyed on the byte counts it was built from
+    _progress_text: tuple[int, int, str] | None = field(default=None, repr=False)
 
     @property
     def progress(self) -> float:
@@ -51,9 +65,14 @@ class QueuedTransfer:
     @property
     def progress_text(self) -> str:
         """Get human-readable progress text."""
+        cached = self._progress_text
+        if cached and cached[0] == self.transferred_bytes and cached[1] == self.total_size:
+            return cached[2]
         sent = format_size(self.transferred_bytes)
         total = format_size(self.total_size)
-        return f"{sent} / {total} ({self.progress:.1f}%)"
+        text = f"{sent} / {total} ({self.progress:.1f}%)"
+        self._progress_text = (self.transferred_bytes, self.total_size, text)
+        return text
 
     @property
     def speed_text(self) -> str:
@@ -76,7 +95,18 @@ class QueuedTransfer:
     @property
     def is_active(self) -> bool:
         """Check if transfer is actively running."""
-        return self.status in ("connecting", "transferring", "retrying", "verifying", "tarring", "extracting")
+        return self.status in ACTIVE_STATUSES
+
+
+def _send_metadata(path: Path) -> tuple[str, int]:
+    """Display name and total size of a file or folder to send."""
+    from lantransfer.utils import get_folder_size
+
+    # Handle both files and folders from a single stat call
+    st = path.stat()
+    if stat.S_ISDIR(st.st_mode):
+        return f"{path.name}/", get_folder_size(path)  # Trailing slash marks a folder
+    return path.name, st.st_size
 
 
 @dataclass
@@ -90,10 +120,24 @@ class TransferManager:
     on_transfer_completed: Callable[[QueuedTransfer], None] | None = None
     on_transfer_failed: Callable[[QueuedTransfer], None] | None = None
 
+    # Sends run concurrently, up to this many overall and this many per peer
+    max_concurrent_sends: int = 4
+    max_sends_per_peer: int = 2
+
     _queue: dict[str, QueuedTransfer] = field(default_factory=dict, init=False, repr=False)
     _pending_sends: asyncio.Queue = field(default_factory=asyncio.Queue, init=False, repr=False)
-    _send_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    _send_tasks: list[asyncio.Task] = field(default_factory=list, init=False, repr=False)
+    # Sends running per peer URL, and sends held back while their peer is at its limit
+    _peer_sends: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _parked: dict[str, deque] = field(default_factory=dict, init=False, repr=False)
+    # Queue id of each started OutgoingTransfer by its _local_id, for the client callbacks
+    _by_outgoing: dict[int, str] = field(default_factory=dict, init=False, repr=False)
+    # Queue ids by status group, kept by _set_status; dicts as insertion-ordered sets
+    _active_ids: dict[str, None] = field(default_factory=dict, init=False, repr=False)
+    _finished_ids: dict[str, None] = field(default_factory=dict, init=False, repr=False)
     _running: bool = field(default=False, init=False, repr=False)
+    _loop: asyncio.AbstractEventLoop | None = field(default=None, init=False, repr=False)
+    _notify_pending: bool = field(default=False, init=False, repr=False)
 
     @property
     def queue(self) -> list[QueuedTransfer]:
@@ -103,26 +147,31 @@ class TransferManager:
     @property
     def active_transfers(self) -> list[QueuedTransfer]:
         """Get currently active transfers."""
-        return [t for t in self._queue.values() if t.is_active]
+        return [self._queue[qid] for qid in self._active_ids]
 
     @property
     def completed_transfers(self) -> list[QueuedTransfer]:
         """Get completed transfers."""
-        return [t for t in self._queue.values() if t.status == "completed"]
+        finished = (self._queue[qid] for qid in self._finished_ids)
+        return [t for t in finished if t.status == "completed"]
 
     async def start(self) -> None:
         """Start the transfer manager."""
         if self._running:
             return
 
+        self._loop = asyncio.get_running_loop()
+
         # Set up callbacks
         self._setup_callbacks()
 
         # Start server
         await self.server.start()
 
-        # Start send worker
-        self._send_task = asyncio.create_task(self._send_worker())
+        # Start send workers
+        self._send_tasks = [
+            asyncio.create_task(self._send_worker()) for _ in range(self.max_concurrent_sends)
+        ]
 
         self._running = True
 
@@ -131,14 +180,15 @@ class TransferManager:
         if not self._running:
             return
 
-        # Stop send worker
-        if self._send_task:
-            self._send_task.cancel()
-            try:
-                await self._send_task
-            except asyncio.CancelledError:
-                pass
-            self._send_task = None
+        # Stop send workers
+        for task in self._send_tasks:
+            task.cancel()
+        await asyncio.gather(*self._send_tasks, return_exceptions=True)
+        self._send_tasks = []
+        self._parked.clear()
+
+        # Close pooled client connections
+        await self.client.aclose()
 
         # Stop server
         await self.server.stop()
@@ -164,19 +214,28 @@ class TransferManager:
         self.client.on_tarring_started = self._on_tarring_started
         self.client.on_tarring_completed = self._on_tarring_completed
 
-    def queue_send(self, path: Path, peer: Peer) -> str:
+    async def queue_send(self, path: Path, peer: Peer) -> str:
         """Queue a file or folder to be sent to a peer."""
-        from lantransfer.utils import get_folder_size
+        # Stat and folder walk can take seconds on large trees or network mounts
+        filename, total_size = await asyncio.to_thread(_send_metadata, path)
+        queue_id = self._enqueue_send(path, peer, filename, total_size)
+        self._notify_queue_updated()
+        return queue_id
 
-        queue_id = str(uuid4())[:8]
+    async def queue_send_many(self, paths: list[Path], peer: Peer) -> list[str]:
+        """Queue several files or folders for a peer with a single queue update."""
+        metadata = await asyncio.to_thread(lambda: [_send_metadata(path) for path in paths])
+        queue_ids = [
+            self._enqueue_send(path, peer, filename, total_size)
+            for path, (filename, total_size) in zip(paths, metadata)
+        ]
+        if queue_ids:
+            self._notify_queue_updated()
+        return queue_ids
 
-        # Calculate size (handle both files and folders)
-        if path.is_dir():
-            total_size = get_folder_size(path)
-            filename = f"{path.name}/"  # Indicate it's a folder
-        else:
-            total_size = path.stat().st_size
-            filename = path.name
+    def _enqueue_send(self, path: Path, peer: Peer, filename: str, total_size: int) -> str:
+        """Add a send to the queue without notifying listeners."""
+        queue_id = generate_transfer_id()
 
         transfer = QueuedTransfer(
             id=queue_id,
@@ -191,8 +250,6 @@ class TransferManager:
 
         self._queue[queue_id] = transfer
         self._pending_sends.put_nowait((queue_id, path, peer))
-
-        self._notify_queue_updated()
         return queue_id
 
     def cancel_transfer(self, queue_id: str) -> bool:
@@ -205,43 +262,43 @@ class TransferManager:
         if transfer.status == "completed":
             return False
 
-        transfer.status = "cancelled"
+        self._set_status(transfer, "cancelled")
         
-        # Cancel outgoing transfer if active - use the stored transfer key for reliability
-        if transfer._outgoing and transfer._outgoing._transfer_key:
+        # Cancel outgoing transfer if active - use the client's id for reliability
+        if transfer._outgoing and transfer._outgoing._local_id:
             # Set the cancel flag immediately (synchronous)
-            self.client.cancel_transfer_by_key(transfer._outgoing._transfer_key)
+            self.client.cancel_transfer_by_id(transfer._outgoing._local_id)
 
         self._notify_queue_updated()
         return True
 
     def clear_completed(self) -> None:
         """Remove completed and failed transfers from the queue."""
-        to_remove = [
-            qid for qid, t in self._queue.items()
-            if t.status in ("completed", "failed", "cancelled")
-        ]
-        for qid in to_remove:
-            del self._queue[qid]
-        
+        # Swap the index out first; callbacks may finish more transfers meanwhile
+        finished, self._finished_ids = self._finished_ids, {}
+        for qid in finished:
+            self._queue.pop(qid, None)
+
         self._notify_queue_updated()
 
     async def _send_worker(self) -> None:
         """Worker that processes the send queue."""
         while True:
             try:
-                queue_id, path, peer = await self._pending_sends.get()
-
-                if queue_id not in self._queue:
+                item = await self._pending_sends.get()
+                peer_url = item[2].url
+
+                # Park sends to a peer at its limit rather than waiting on it here, so
+                # this worker stays free for other peers; the worker that finishes a
+                # send to that peer takes the parked ones in order
+                if self._peer_sends.get(peer_url, 0) >= self.max_sends_per_peer:
+                    self._parked.setdefault(peer_url, deque()).append(item)
                     continue
 
-                transfer = self._queue[queue_id]
-                
-                if transfer.status == "cancelled":
-                    continue
-
-                # Send the file or folder
-                await self.client.send_path(path, peer.url)
+                while item:
+                    await self._send_queued(*item)
+                    parked = self._parked.get(peer_url)
+                    item = parked.popleft() if parked else None
 
             except asyncio.CancelledError:
                 break
@@ -249,8 +306,50 @@ class TransferManager:
                 # Log error but keep worker running
                 print(f"Send worker error: {e}")
 
+    async def _send_queued(self, queue_id: str, path: Path, peer: Peer) -> None:
+        """Send one queue entry, counting it against its peer's limit."""
+        transfer = self._queue.get(queue_id)
+        if transfer is None or transfer.status == "cancelled":
+            return
+
+        self._peer_sends[peer.url] = self._peer_sends.get(peer.url, 0) + 1
+        try:
+            # The queue id rides along as the tag, so callbacks find this entry
+            await self.client.send_path(path, peer.url, tag=queue_id)
+        finally:
+            self._peer_sends[peer.url] -= 1
+
+    def _set_status(self, queued: QueuedTransfer, status: str) -> None:
+        """Change a queue entry's status, keeping the status indices in step."""
+        if queued.status == status:
+            return
+        queued.status = status
+        if status in ACTIVE_STATUSES:
+            self._active_ids[queued.id] = None
+        else:
+            self._active_ids.pop(queued.id, None)
+        if status in FINISHED_STATUSES:
+            self._finished_ids[queued.id] = None
+        else:
+            self._finished_ids.pop(queued.id, None)
+
     def _notify_queue_updated(self) -> None:
-        """Notify listeners that the queue has changed."""
+        """Notify listeners that the queue has changed, coalescing bursts of changes."""
+        if not self.on_queue_updated or self._notify_pending:
+            return
+        if not self._loop:
+            self.on_queue_updated()
+            return
+
+        # Safe from UI handler threads too; call_later itself must run on the loop
+        self._notify_pending = True
+        self._loop.call_soon_threadsafe(
+            self._loop.call_later, QUEUE_NOTIFY_INTERVAL, self._flush_queue_updated
+        )
+
+    def _flush_queue_updated(self) -> None:
+        """Deliver a coalesced queue update."""
+        self._notify_pending = False
         if self.on_queue_updated:
             self.on_queue_updated()
 
@@ -264,29 +363,28 @@ class TransferManager:
             direction=TransferDirection.INCOMING,
             filename=transfer.filename,
             total_size=transfer.total_size,
-            status="transferring",
             _incoming=transfer,
         )
 
         self._queue[queue_id] = queued
+        self._set_status(queued, "transferring")
         self._notify_queue_updated()
 
     def _on_incoming_progress(self, transfer: IncomingTransfer) -> None:
         """Called when incoming transfer progresses."""
-        queue_id = transfer.transfer_id
-
-        if queue_id in self._queue:
-            queued = self._queue[queue_id]
+        queued = self._queue.get(transfer.transfer_id)
+        if queued:
+            # Only notify once progress moves by a visible amount (64 KiB)
+            last = queued.transferred_bytes >> PROGRESS_NOTIFY_SHIFT
             queued.transferred_bytes = transfer.received_bytes
-            self._notify_queue_updated()
+            if transfer.received_bytes >> PROGRESS_NOTIFY_SHIFT != last:
+                self._notify_queue_updated()
 
     def _on_incoming_completed(self, transfer: IncomingTransfer) -> None:
         """Called when incoming transfer completes."""
-        queue_id = transfer.transfer_id
-
-        if queue_id in self._queue:
-            queued = self._queue[queue_id]
-            queued.status = "completed"
+        queued = self._queue.get(transfer.transfer_id)
+        if queued:
+            self._set_status(queued, "completed")
             queued.transferred_bytes = transfer.total_size
             self._notify_queue_updated()
 
@@ -295,11 +393,9 @@ class TransferManager:
 
     def _on_incoming_failed(self, transfer: IncomingTransfer, error: str) -> None:
         """Called when incoming transfer fails."""
-        queue_id = transfer.transfer_id
-
-        if queue_id in self._queue:
-            queued = self._queue[queue_id]
-            queued.status = "failed"
+        queued = self._queue.get(transfer.transfer_id)
+        if queued:
+            self._set_status(queued, "failed")
             queued.error = error
             self._notify_queue_updated()
 
@@ -307,100 +403,100 @@ class TransferManager:
                 self.on_transfer_failed(queued)
 
     # Outgoing transfer callbacks
+    def _queued_for(
+        self, transfer: OutgoingTransfer, finished: bool = False
+    ) -> QueuedTransfer | None:
+        """Look up the queue entry of a started outgoing transfer."""
+        if finished:
+            queue_id = self._by_outgoing.pop(transfer._local_id, None)
+        else:
+            queue_id = self._by_outgoing.get(transfer._local_id)
+        return self._queue.get(queue_id) if queue_id else None
+
     def _on_outgoing_started(self, transfer: OutgoingTransfer) -> None:
         """Called when an outgoing transfer starts."""
-        # Find the queued transfer by file path
-        # Use original_path for matching, which works for both files and folders
-        match_path = transfer.original_path if transfer.original_path else transfer.file_path
-        for queued in self._queue.values():
-            if queued._file_path == match_path and queued.direction == TransferDirection.OUTGOING:
-                queued._outgoing = transfer
-                queued.status = "connecting"
-                self._notify_queue_updated()
-                break
+        # The tag is the queue id _send_queued passed to send_path
+        queued = self._queue.get(transfer.tag)
+        if queued:
+            self._by_outgoing[transfer._local_id] = transfer.tag
+            queued._outgoing = transfer
+            self._set_status(queued, "connecting")
+            self._notify_queue_updated()
 
     def _on_outgoing_progress(self, transfer: OutgoingTransfer) -> None:
         """Called when outgoing transfer progresses."""
-        for queued in self._queue.values():
-            # Use 'is' for identity comparison since OutgoingTransfer is a dataclass
-            # and '==' would compare all fields which may have changed
-            if queued._outgoing is transfer:
-                queued.transferred_bytes = transfer.sent_bytes
-                queued.status = transfer.status.value
-                queued.speed = transfer.speed
+        queued = self._queued_for(transfer)
+        if queued:
+            last = queued.transferred_bytes
+            status = queued.status
+            queued.transferred_bytes = transfer.sent_bytes
+            self._set_status(queued, transfer.status.value)
+            queued.speed = transfer.speed
+            if queued.status != status or (
+                (transfer.sent_bytes >> PROGRESS_NOTIFY_SHIFT) != (last >> PROGRESS_NOTIFY_SHIFT)
+            ):
                 self._notify_queue_updated()
-                break
 
     def _on_outgoing_completed(self, transfer: OutgoingTransfer) -> None:
         """Called when outgoing transfer completes."""
-        for queued in self._queue.values():
-            # Use 'is' for identity comparison since OutgoingTransfer is a dataclass
-            if queued._outgoing is transfer:
-                queued.status = "completed"
-                # Set transferred_bytes to queued.total_size to show 100% progress
-                # (for folders, transfer.total_size is tarball size which differs from folder size)
-                queued.transferred_bytes = queued.total_size
-                self._notify_queue_updated()
+        queued = self._queued_for(transfer, finished=True)
+        if queued:
+            self._set_status(queued, "completed")
+            # Set transferred_bytes to queued.total_size to show 100% progress
+            # (for folders, transfer.total_size is tarball size which differs from folder size)
+            queued.transferred_bytes = queued.total_size
+            self._notify_queue_updated()
 
-                if self.on_transfer_completed:
-                    self.on_transfer_completed(queued)
-                break
+            if self.on_transfer_completed:
+                self.on_transfer_completed(queued)
 
     def _on_outgoing_failed(self, transfer: OutgoingTransfer, error: str) -> None:
         """Called when outgoing transfer fails."""
-        for queued in self._queue.values():
-            # Use 'is' for identity comparison since OutgoingTransfer is a dataclass
-            if queued._outgoing is transfer:
-                queued.status = "failed"
-                queued.error = error
-                self._notify_queue_updated()
+        queued = self._queued_for(transfer, finished=True)
+        if queued:
+            self._set_status(queued, "failed")
+            queued.error = error
+            self._notify_queue_updated()
 
-                if self.on_transfer_failed:
-                    self.on_transfer_failed(queued)
-                break
+            if self.on_transfer_failed:
+                self.on_transfer_failed(queued)
 
     def _on_outgoing_cancelled(self, transfer: OutgoingTransfer) -> None:
         """Called when outgoing transfer is cancelled."""
-        for queued in self._queue.values():
-            # Use 'is' for identity comparison since OutgoingTransfer is a dataclass
-            if queued._outgoing is transfer:
-                queued.status = "cancelled"
-                self._notify_queue_updated()
-                break
+        queued = self._queued_for(transfer, finished=True)
+        if queued:
+            self._set_status(queued, "cancelled")
+            self._notify_queue_updated()
 
     # Tarring callbacks (outgoing folder transfers)
-    def _on_tarring_started(self, folder_path: Path) -> None:
+    def _on_tarring_started(self, folder_path: Path, queue_id: str) -> None:
         """Called when tarring starts for a folder transfer."""
-        for queued in self._queue.values():
-            if queued._file_path == folder_path and queued.direction == TransferDirection.OUTGOING:
-                queued.is_tarring = True
-                queued.status = "tarring"
-                self._notify_queue_updated()
-                break
+        queued = self._queue.get(queue_id)
+        if queued:
+            queued.is_tarring = True
+            self._set_status(queued, "tarring")
+            self._notify_queue_updated()
 
-    def _on_tarring_completed(self, folder_path: Path) -> None:
+    def _on_tarring_completed(self, folder_path: Path, queue_id: str) -> None:
         """Called when tarring completes for a folder transfer."""
-        for queued in self._queue.values():
-            if queued._file_path == folder_path and queued.direction == TransferDirection.OUTGOING:
-                queued.is_tarring = False
-                self._notify_queue_updated()
-                break
+        queued = self._queue.get(queue_id)
+        if queued:
+            queued.is_tarring = False
+            self._notify_queue_updated()
 
     # Extracting callbacks (incoming folder transfers)
     def _on_extracting_started(self, transfer: IncomingTransfer) -> None:
         """Called when extraction starts for an incoming folder transfer."""
-        queue_id = transfer.transfer_id
-        if queue_id in self._queue:
-            queued = self._queue[queue_id]
+        queued = self._queue.get(transfer.transfer_id)
+        if queued:
             queued.is_extracting = True
-            queued.status = "extracting"
+            self._set_status(queued, "extracting")
             self._notify_queue_updated()
 
     def _on_extracting_completed(self, transfer: IncomingTransfer) -> None:
         """Called when extraction completes for an incoming folder transfer."""
-        queue_id = transfer.transfer_id
-        if queue_id in self._queue:
-            queued = self._queue[queue_id]
+        queued = self._queue.get(transfer.transfer_id)
+        if queued:
             queued.is_extracting = False
             self._notify_queue_updated()
 
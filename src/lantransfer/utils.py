@@ -1,48 +1,74 @@
 """Utility functions for LAN Transfer."""
 
 import asyncio
+import functools
 import hashlib
+import itertools
+import json
 import os
 import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import AsyncIterator, Callable
+from typing import Any, AsyncIterator, Callable
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib json module is the fallback
+    orjson = None
 
 # Constants
-CHUNK_SIZE = 1024 * 1024  # 1MB chunks for large file transfer
+CHUNK_SIZE = 16 * 1024 * 1024  # 16MB chunks keep the link busy between per-chunk round trips
+MAX_CHUNK_BYTES = 4 * CHUNK_SIZE  # Largest chunk body the receiver accepts
+# Chunk size for receivers that don't announce max_chunk_size (1.0 peers cap bodies at 2MB)
+LEGACY_CHUNK_SIZE = CHUNK_SIZE // 16
 DEFAULT_PORT = 8765
 SERVICE_TYPE = "_lantransfer._tcp.local."
 MAX_RETRY_DELAY = 30  # Maximum retry delay in seconds
 INITIAL_RETRY_DELAY = 1  # Initial retry delay in seconds
 CONNECTION_TIMEOUT = 30  # Connection timeout in seconds
+MIN_TRANSFER_RATE = 32 * 1024  # Slowest link (bytes/s) that chunk timeouts allow for
+PROGRESS_CALLBACK_INTERVAL = 1 / 30  # Minimum seconds between progress callbacks (~30 Hz)
+FOLDER_SCAN_WORKERS = 8  # Threads listing directories when sizing a folder
+
+
+def new_sha256() -> "hashlib._Hash":
+    """Create a SHA-256 hasher for integrity checks."""
+    # Not a security use, so FIPS-restricted OpenSSL builds don't refuse or slow it
+    return hashlib.sha256(usedforsecurity=False)
 
 
 def get_file_hash(file_path: Path) -> str:
     """Calculate SHA-256 hash of a file."""
-    sha256_hash = hashlib.sha256()
+    # file_digest runs the read/update loop in C with the GIL released
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
-            sha256_hash.update(chunk)
-    return sha256_hash.hexdigest()
+        return hashlib.file_digest(f, new_sha256).hexdigest()
 
 
 async def get_file_hash_async(file_path: Path) -> str:
     """Calculate SHA-256 hash of a file asynchronously."""
-    import aiofiles
+    return await asyncio.to_thread(get_file_hash, file_path)
+
+
+if orjson:
+    def json_dumps(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
 
-    sha256_hash = hashlib.sha256()
-    async with aiofiles.open(file_path, "rb") as f:
-        while chunk := await f.read(CHUNK_SIZE):
-            sha256_hash.update(chunk)
-    return sha256_hash.hexdigest()
+    json_loads = orjson.loads
+else:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
 
 
 def format_size(size_bytes: int) -> str:
     """Format bytes to human readable size."""
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} PB"
+    # Each unit is 10 more bits, so the bit length picks it without a loop
+    unit = min(max(0, (int(size_bytes).bit_length() - 1) // 10), len(SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (10 * unit)):.1f} {SIZE_UNITS[unit]}"
 
 
 def format_speed(bytes_per_second: float) -> str:
@@ -69,20 +95,52 @@ async def read_file_chunks(
     start_offset: int = 0,
     chunk_size: int = CHUNK_SIZE,
     progress_callback: Callable[[int], None] | None = None,
+    prefetch: int = 4,
 ) -> AsyncIterator[bytes]:
-    """Read file in chunks asynchronously, starting from offset."""
-    import aiofiles
+    """Read file in chunks asynchronously, starting from offset.
+
+    A dedicated thread reads up to prefetch chunks ahead of the consumer, so
+    disk reads overlap whatever the consumer does with each chunk.
+    """
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(prefetch)  # bounds chunks read but not yet consumed
+    stopped = False
+
+    def read_ahead() -> None:
+        try:
+            with open(file_path, "rb", buffering=0) as f:
+                f.seek(start_offset)
+                while True:
+                    slots.acquire()
+                    if stopped:
+                        return
+                    chunk = f.read(chunk_size)
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                    if not chunk:
+                        return
+        except BaseException as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+    threading.Thread(target=read_ahead, name="lantransfer-read", daemon=True).start()
 
     total_read = start_offset
-    async with aiofiles.open(file_path, "rb") as f:
-        await f.seek(start_offset)
-        while chunk := await f.read(chunk_size):
+    try:
+        while chunk := await chunks.get():
+            if isinstance(chunk, BaseException):
+                raise chunk
+            slots.release()
             yield chunk
             total_read += len(chunk)
             if progress_callback:
                 progress_callback(total_read)
+    finally:
+        # Wake the reader if it is waiting for a slot so it can exit
+        stopped = True
+        slots.release()
 
 
+@functools.cache
 def get_device_name() -> str:
     """Get a friendly device name."""
     import socket
@@ -94,8 +152,13 @@ def get_device_name() -> str:
     return hostname
 
 
+@functools.cache
 def get_local_ip() -> str:
-    """Get the local IP address of this machine."""
+    """Get the local IP address of this machine.
+
+    Cached for the process lifetime; call get_local_ip.cache_clear() after a
+    network change to look it up again.
+    """
     import socket
 
     try:
@@ -111,11 +174,28 @@ def get_local_ip() -> str:
         return "127.0.0.1"
 
 
+# Transfer IDs: a random per-process prefix keeps IDs from an earlier run (still
+# referenced by saved resume state) distinct; the counter keeps them unique within this one
+_ID_PREFIX = os.urandom(3).hex()
+_id_counter = itertools.count(1)
+
+
 def generate_transfer_id() -> str:
     """Generate a unique transfer ID."""
-    import uuid
+    return f"{_ID_PREFIX}{next(_id_counter):04x}"
 
-    return str(uuid.uuid4())[:8]
+
+def next_retry_delay(
+    delay: float,
+    initial_delay: float = INITIAL_RETRY_DELAY,
+    max_delay: float = MAX_RETRY_DELAY,
+) -> float:
+    """Pick the next retry delay with decorrelated jitter.
+
+    Each delay is drawn between initial_delay and three times the previous one,
+    so retriers that failed together drift apart instead of retrying in lockstep.
+    """
+    return min(max_delay, random.uniform(initial_delay, delay * 3))
 
 
 async def retry_with_backoff(
@@ -126,7 +206,7 @@ async def retry_with_backoff(
     exceptions: tuple = (Exception,),
 ):
     """
-    Retry an async function with exponential backoff.
+    Retry an async function with exponential backoff and decorrelated jitter.
     
     Args:
         func: Async function to retry
@@ -152,16 +232,13 @@ async def retry_with_backoff(
             if attempt == max_retries:
                 raise
 
-            # Add jitter to prevent thundering herd
-            jitter = random.uniform(0, delay * 0.1)
-            await asyncio.sleep(delay + jitter)
-
-            # Exponential backoff with max cap
-            delay = min(delay * 2, max_delay)
+            delay = next_retry_delay(delay, initial_delay, max_delay)
+            await asyncio.sleep(delay)
 
     raise last_exception  # type: ignore
 
 
+@functools.cache
 def get_data_dir() -> Path:
     """Get the application data directory."""
     home = Path.home()
@@ -170,6 +247,7 @@ def get_data_dir() -> Path:
     return data_dir
 
 
+@functools.cache
 def get_downloads_dir() -> Path:
     """Get the default downloads directory for received files."""
     downloads = get_data_dir() / "downloads"
@@ -177,27 +255,62 @@ def get_downloads_dir() -> Path:
     return downloads
 
 
-def get_folder_size(folder_path: Path) -> int:
-    """Calculate total size of all files in a folder."""
-    total_size = 0
-    for dirpath, _, filenames in os.walk(folder_path):
-        for filename in filenames:
-            filepath = Path(dirpath) / filename
-            total_size += filepath.stat().st_size
-    return total_size
-
-
-def list_folder_files(folder_path: Path) -> list[tuple[Path, int]]:
-    """List all files in a folder with their relative paths and sizes."""
+def _scan_dir(path: str) -> tuple[list[tuple[str, int]], list[str]]:
+    """List one directory: (path, size) for its files, and its subdirectories."""
     files = []
-    for dirpath, _, filenames in os.walk(folder_path):
-        for filename in filenames:
-            filepath = Path(dirpath) / filename
-            relative_path = filepath.relative_to(folder_path)
-            files.append((relative_path, filepath.stat().st_size))
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # Like os.walk, don't descend into symlinked directories
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    files.append((entry.path, entry.stat().st_size))
+    except OSError:
+        # Unreadable directory, skipped as os.walk would
+        pass
+    return files, subdirs
+
+
+def _walk_folder(folder_path: Path) -> list[tuple[str, int]]:
+    """List (path, size) for every file under a folder, scanning directories in parallel."""
+    files = []
+    # Stat-bound work: threads overlap the syscalls, which matters on network mounts
+    with ThreadPoolExecutor(max_workers=FOLDER_SCAN_WORKERS) as pool:
+        pending = {pool.submit(_scan_dir, str(folder_path))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, subdirs = future.result()
+                files.extend(found)
+                pending.update(pool.submit(_scan_dir, subdir) for subdir in subdirs)
     return files
 
 
+@functools.lru_cache(maxsize=64)
+def _folder_listing(folder: str, mtime_ns: int) -> tuple[int, tuple[tuple[str, int], ...]]:
+    """Total size and file list of a folder, memoized per folder mtime."""
+    files = tuple(_walk_folder(Path(folder)))
+    return sum(size for _, size in files), files
+
+
+def _cached_folder_listing(folder_path: Path) -> tuple[int, tuple[tuple[str, int], ...]]:
+    """Folder listing from the cache, re-walked when the folder's mtime changes."""
+    # Keyed on the top directory's mtime, which changes when entries are added,
+    # removed or renamed there; edits deeper in the tree can be missed, which is
+    # acceptable for the queue's size estimate
+    return _folder_listing(str(folder_path), folder_path.stat().st_mtime_ns)
 
 
+def get_folder_size(folder_path: Path) -> int:
+    """Calculate total size of all files in a folder."""
+    return _cached_folder_listing(folder_path)[0]
 
+
+def list_folder_files(folder_path: Path) -> list[tuple[str, int]]:
+    """List all files in a folder with their relative paths and sizes."""
+    # Walked paths all start with the folder path, so slicing it off is enough;
+    # callers that need Path objects can wrap the strings themselves
+    prefix_len = len(os.path.join(folder_path, ""))
+    return [(path[prefix_len:], size) for path, size in _cached_folder_listing(folder_path)[1]]